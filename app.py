@@ -8,17 +8,34 @@ import io
 
 from database import Database
 from ocr_processor import OCRProcessor
+from ocr_cache import OCRCache
+from ocr_worker_pool import tesserocr_available
+from image_preprocessor import ImagePreprocessor
+from receipt_locator import ReceiptLocator
 from item_categorizer import ItemCategorizer
+from category_model import CategoryModel
+from enrichment_cache import EnrichmentCache
 from nutrition_analyzer import NutritionAnalyzer
 from budget_tracker import BudgetTracker
+from item_stats import ItemStats
 
 # Initialize components
 @st.cache_resource
 def init_components():
     db = Database()
-    ocr = OCRProcessor()
-    categorizer = ItemCategorizer()
-    nutrition = NutritionAnalyzer()
+    ocr = OCRProcessor(
+        concurrent=True,
+        cache=OCRCache(db),
+        # Warm OCR workers only pay off when they can keep the engine loaded
+        pool_size=2 if tesserocr_available() else 0,
+        preprocessor=ImagePreprocessor(),
+        locator=ReceiptLocator(),
+        tile_height=3000
+    )
+    # Category and nutrition results for item names seen before
+    enrichment_cache = EnrichmentCache()
+    categorizer = ItemCategorizer(model=CategoryModel(), database=db, cache=enrichment_cache)
+    nutrition = NutritionAnalyzer(cache=enrichment_cache)
     budget = BudgetTracker(db)
     return db, ocr, categorizer, nutrition, budget
 
@@ -54,6 +71,9 @@ def main():
 def upload_receipt_page(db, ocr, categorizer, nutrition):
     st.header("📸 Upload Receipt")
     
+    if 'saved_total' in st.session_state:
+        st.success(f"Receipt saved successfully! Total: ${st.session_state.pop('saved_total'):.2f}")
+    
     uploaded_file = st.file_uploader(
         "Choose a receipt image...",
         type=['png', 'jpg', 'jpeg'],
@@ -73,10 +93,11 @@ def upload_receipt_page(db, ocr, categorizer, nutrition):
             st.subheader("Processing Results")
             
             if st.button("Process Receipt", type="primary"):
+                st.session_state.pop('receipt_items', None)
                 with st.spinner("Processing receipt..."):
                     try:
-                        # Extract text using OCR
-                        extracted_text = ocr.extract_text(image)
+                        # Extract text using OCR (cached by image content)
+                        extracted_text, items_data = ocr.process_receipt(image)
                         
                         if not extracted_text.strip():
                             st.error("No text could be extracted from the image. Please try a clearer image.")
@@ -88,9 +109,6 @@ def upload_receipt_page(db, ocr, categorizer, nutrition):
                         
                         st.success("Text extracted successfully!")
                         
-                        # Parse items and prices
-                        items_data = ocr.parse_items_and_prices(extracted_text)
-                        
                         if not items_data:
                             st.warning("No grocery items could be identified in the receipt.")
                             st.markdown("**Troubleshooting tips:**")
@@ -108,67 +126,90 @@ def upload_receipt_page(db, ocr, categorizer, nutrition):
                         df = pd.DataFrame(items_data)
                         
                         # Categorize items
-                        df['category'] = df['item'].apply(categorizer.categorize_item)
+                        df['category'] = categorizer.categorize_many(df['item'])
                         
                         # Get nutritional scores
-                        df['nutrition_score'] = df['item'].apply(nutrition.get_nutrition_score)
+                        df['nutrition_score'] = nutrition.score_many(df['item'])
                         
-                        # Display parsed items
-                        st.subheader("Identified Items")
-                        edited_df = st.data_editor(
-                            df,
-                            column_config={
-                                "item": "Item Name",
-                                "price": st.column_config.NumberColumn("Price ($)", format="$%.2f"),
-                                "category": st.column_config.SelectboxColumn(
-                                    "Category",
-                                    options=[
-                                        "Fruits", "Vegetables", "Dairy", "Meat", "Bakery",
-                                        "Beverages", "Snacks", "Frozen", "Canned", "Other"
-                                    ]
-                                ),
-                                "nutrition_score": st.column_config.NumberColumn(
-                                    "Nutrition Score",
-                                    help="1-10 scale (10 = healthiest)",
-                                    min_value=1,
-                                    max_value=10
-                                )
-                            },
-                            hide_index=True,
-                            use_container_width=True
-                        )
-                        
-                        # Save to database
-                        if st.button("Save Receipt Data"):
-                            receipt_id = db.save_receipt(
-                                date=datetime.now(),
-                                total_amount=edited_df['price'].sum(),
-                                items=edited_df.to_dict('records')
-                            )
-                            st.success(f"Receipt saved successfully! Total: ${edited_df['price'].sum():.2f}")
-                            st.rerun()
+                        # Kept across reruns: clicking "Save Receipt Data" reruns the
+                        # script, and this button is not pressed on that run
+                        st.session_state['receipt_items'] = df
+                        st.session_state['receipt_file'] = uploaded_file.file_id
                     
                     except Exception as e:
                         st.error(f"Error processing receipt: {str(e)}")
                         st.text_area("Extracted Text (for debugging):", extracted_text if 'extracted_text' in locals() else "No text extracted")
+            
+            if st.session_state.get('receipt_file') == uploaded_file.file_id and 'receipt_items' in st.session_state:
+                review_receipt_items(db, categorizer, st.session_state['receipt_items'])
+
+def review_receipt_items(db, categorizer, df):
+    """Editable table of the processed items, with the save action"""
+    # Display parsed items
+    st.subheader("Identified Items")
+    edited_df = st.data_editor(
+        df,
+        column_config={
+            "item": "Item Name",
+            "price": st.column_config.NumberColumn("Price ($)", format="$%.2f"),
+            "category": st.column_config.SelectboxColumn(
+                "Category",
+                options=[
+                    "Fruits", "Vegetables", "Dairy", "Meat", "Bakery",
+                    "Beverages", "Snacks", "Frozen", "Canned", "Other"
+                ]
+            ),
+            "nutrition_score": st.column_config.NumberColumn(
+                "Nutrition Score",
+                help="1-10 scale (10 = healthiest)",
+                min_value=1,
+                max_value=10
+            )
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    # Save to database
+    if st.button("Save Receipt Data"):
+        receipt_id = db.save_receipt(
+            date=datetime.now(),
+            total_amount=edited_df['price'].sum(),
+            items=edited_df.to_dict('records')
+        )
+        
+        # Remember categories the user changed from the ones shown. Rows line
+        # up with df since the editor has a fixed number of rows; renaming an
+        # item (e.g. fixing an OCR typo) without touching its category is not
+        # a correction.
+        corrections = [
+            (item, category)
+            for item, category, shown in zip(edited_df['item'], edited_df['category'], df['category'])
+            if isinstance(item, str) and category and category != shown
+        ]
+        if corrections:
+            categorizer.add_custom_mappings(corrections)
+        
+        # Learn from the saved (and corrected) categories in the background
+        if categorizer.model is not None:
+            categorizer.model.maybe_retrain(db, categorizer)
+        
+        del st.session_state['receipt_items']
+        st.session_state['saved_total'] = edited_df['price'].sum()
+        st.rerun()
 
 def dashboard_page(db):
     st.header("📊 Spending Dashboard")
     
     # Get recent receipts
-    receipts = db.get_receipts(limit=50)
+    df_receipts = db.get_receipts_df(limit=50)
     
-    if not receipts:
+    if df_receipts.empty:
         st.info("No receipts found. Upload your first receipt to see analytics!")
         return
     
-    # Convert to DataFrame
-    df_receipts = pd.DataFrame(receipts)
-    df_receipts['date'] = pd.to_datetime(df_receipts['date'])
-    
-    # Get all items
-    items = db.get_all_items()
-    df_items = pd.DataFrame(items)
+    # Aggregate item history chunk by chunk instead of loading it all
+    item_stats = ItemStats.from_chunks(db.iter_items_df())
     
     # Summary metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -182,11 +223,11 @@ def dashboard_page(db):
         st.metric("Average Receipt", f"${avg_receipt:.2f}")
     
     with col3:
-        total_items = len(df_items)
+        total_items = item_stats.count
         st.metric("Total Items", total_items)
     
     with col4:
-        unique_items = df_items['item_name'].nunique() if not df_items.empty else 0
+        unique_items = item_stats.unique_items
         st.metric("Unique Items", unique_items)
     
     # Charts
@@ -207,8 +248,8 @@ def dashboard_page(db):
     
     with col2:
         st.subheader("Spending by Category")
-        if not df_items.empty:
-            category_spending = df_items.groupby('category')['price'].sum().reset_index()
+        if item_stats.count:
+            category_spending = item_stats.category_spending()
             fig_cat = px.pie(
                 category_spending,
                 values='price',
@@ -318,16 +359,14 @@ def nutrition_analysis_page(db, nutrition_analyzer):
     st.header("🥗 Nutrition Analysis")
     
     # Get nutrition data
-    items = db.get_all_items()
+    item_stats = ItemStats.from_chunks(db.iter_items_df())
     
-    if not items:
+    if not item_stats.count:
         st.info("No items found. Upload some receipts to see nutritional analysis!")
         return
     
-    df_items = pd.DataFrame(items)
-    
     # Overall nutrition score
-    avg_nutrition_score = df_items['nutrition_score'].mean()
+    avg_nutrition_score = item_stats.average_score
     
     col1, col2, col3 = st.columns(3)
     
@@ -343,16 +382,16 @@ def nutrition_analysis_page(db, nutrition_analyzer):
             st.error("❌ Consider healthier alternatives")
     
     with col2:
-        healthy_items = len(df_items[df_items['nutrition_score'] >= 7])
-        st.metric("Healthy Items", f"{healthy_items}/{len(df_items)}")
+        healthy_items = item_stats.healthy
+        st.metric("Healthy Items", f"{healthy_items}/{item_stats.count}")
     
     with col3:
-        unhealthy_items = len(df_items[df_items['nutrition_score'] <= 4])
+        unhealthy_items = item_stats.unhealthy
         st.metric("Items to Improve", unhealthy_items)
     
     # Nutrition by category
     st.subheader("Nutrition Score by Category")
-    category_nutrition = df_items.groupby('category')['nutrition_score'].mean().reset_index()
+    category_nutrition = item_stats.category_nutrition()
     category_nutrition = category_nutrition.sort_values('nutrition_score', ascending=True)
     
     fig_nutrition = px.bar(
@@ -368,7 +407,7 @@ def nutrition_analysis_page(db, nutrition_analyzer):
     
     # Recent items analysis
     st.subheader("Recent Items Analysis")
-    recent_items = df_items.nlargest(20, 'id')[['item_name', 'category', 'nutrition_score', 'price']]
+    recent_items = item_stats.recent[['item_name', 'category', 'nutrition_score', 'price']]
     
     # Color code by nutrition score
     def get_nutrition_color(score):
@@ -396,7 +435,7 @@ def nutrition_analysis_page(db, nutrition_analyzer):
     
     # Recommendations
     st.subheader("🎯 Recommendations")
-    recommendations = nutrition_analyzer.get_recommendations(df_items)
+    recommendations = nutrition_analyzer.get_recommendations_from_stats(item_stats)
     
     if recommendations:
         for rec in recommendations:
@@ -0,0 +1,242 @@
+"""
+Headless batch ingestion of receipt images.
+
+Runs OCR -> item parsing -> categorization -> nutrition scoring across a
+process pool and saves the receipts in batched transactions. Files already
+ingested (matched by content hash) are skipped, so an interrupted run can
+simply be started again.
+
+Usage: python batch_ingest.py receipts/ "scans/2023/*.jpg" --workers 4
+"""
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from PIL import Image
+
+from database import Database
+from ocr_processor import OCRProcessor
+from image_preprocessor import ImagePreprocessor
+from receipt_locator import ReceiptLocator
+from item_categorizer import ItemCategorizer
+from category_model import CategoryModel
+from enrichment_cache import EnrichmentCache
+from nutrition_analyzer import NutritionAnalyzer
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp')
+
+# Dates printed on receipts, e.g. 12/31/2023 or 1-5-24
+RECEIPT_DATE_PATTERN = re.compile(r'\b(\d{1,2})[/-](\d{1,2})[/-](\d{2}|\d{4})\b')
+
+# Components built once per worker process
+_worker = {}
+
+def _init_worker(single_pass, cascade, db_path):
+    """Create the OCR and enrichment components in a pool worker"""
+    _worker['ocr'] = OCRProcessor(
+        single_pass=single_pass,
+        cascade=cascade,
+        preprocessor=ImagePreprocessor(),
+        locator=ReceiptLocator()
+    )
+    # Custom mappings (user corrections) are loaded once per worker, and
+    # repeated item names are enriched once per worker
+    enrichment_cache = EnrichmentCache()
+    _worker['categorizer'] = ItemCategorizer(model=CategoryModel(), database=Database(db_path),
+                                             cache=enrichment_cache)
+    _worker['nutrition'] = NutritionAnalyzer(cache=enrichment_cache)
+
+def process_file(path):
+    """OCR, parse and enrich one receipt image (runs in a pool worker)"""
+    ocr = _worker['ocr']
+    categorizer = _worker['categorizer']
+    nutrition = _worker['nutrition']
+    
+    with Image.open(path) as image:
+        image.load()
+        text = ocr.extract_text(image)
+    ocr_info = ocr.last_ocr_info
+    
+    # Failures here keep the file out of the ingested ledger, so it is retried
+    if not text.strip():
+        raise Exception("no text extracted (OCR failed or the image is blank)")
+    items = ocr.parse_items_and_prices(text)
+    if not items:
+        raise Exception("no items found in the extracted text")
+    
+    names = [item['item'] for item in items]
+    for item, category, score in zip(items, categorizer.categorize_many(names), nutrition.score_many(names)):
+        item['category'] = category
+        item['nutrition_score'] = score
+    
+    return {
+        'date': receipt_date(text, path),
+        'total_amount': round(sum(item['price'] for item in items), 2),
+        'items': items,
+        'ocr_stage': ocr_info.get('stage'),
+        'ocr_passes': ocr_info.get('passes')
+    }
+
+def receipt_date(text, path):
+    """Date printed on the receipt, falling back to the file's modification time"""
+    for match in RECEIPT_DATE_PATTERN.finditer(text or ''):
+        month, day, year = (int(part) for part in match.groups())
+        if year < 100:
+            year += 2000
+        try:
+            return datetime(year, month, day)
+        except ValueError:
+            continue
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+def find_images(inputs):
+    """Expand directories and glob patterns into a sorted list of image files"""
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                for name in files:
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        paths.add(os.path.join(root, name))
+        else:
+            for path in glob.glob(pattern, recursive=True):
+                if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.add(path)
+    return sorted(paths)
+
+def file_hash(path):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def ingest(inputs, db_path='grocery_manager.db', workers=None, batch_size=50,
+           resume=True, single_pass=False, cascade=None, out=sys.stdout):
+    """Ingest every receipt image matched by inputs and return a summary dict"""
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    db = Database(db_path)
+    paths = find_images(inputs)
+    
+    # Resume: skip files whose content was already ingested
+    done = db.get_ingested_hashes() if resume else set()
+    pending = []
+    seen = set()
+    for path in paths:
+        content_hash = file_hash(path)
+        if content_hash in done or content_hash in seen:
+            continue
+        seen.add(content_hash)
+        pending.append((path, content_hash))
+    
+    summary = {
+        'found': len(paths),
+        'skipped': len(paths) - len(pending),
+        'processed': 0,
+        'receipts': 0,
+        'items': 0,
+        'failed': 0,
+        'ocr_passes': 0,
+        'ocr_stages': {},
+        'seconds': 0.0,
+        'save_seconds': 0.0
+    }
+    print(f"Found {len(paths)} images, {len(pending)} to ingest "
+          f"({summary['skipped']} already ingested or duplicates)", file=out)
+    if not pending:
+        return summary
+    
+    start = time.perf_counter()
+    batch = []
+    
+    def record_save(stats):
+        summary['save_seconds'] += stats['seconds']
+    
+    def flush():
+        if batch:
+            db.save_receipts_bulk(batch, batch_size=batch_size, progress=record_save)
+            batch.clear()
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(single_pass, cascade, db_path)) as executor:
+        futures = {executor.submit(process_file, path): (path, content_hash)
+                   for path, content_hash in pending}
+        
+        for future in as_completed(futures):
+            path, content_hash = futures[future]
+            summary['processed'] += 1
+            try:
+                receipt = future.result()
+            except Exception as e:
+                # Failed files aren't recorded, so the next run retries them
+                summary['failed'] += 1
+                print(f"[{summary['processed']}/{len(pending)}] FAILED {path}: {e}", file=out)
+                continue
+            
+            receipt['source_hash'] = content_hash
+            receipt['source_path'] = path
+            batch.append(receipt)
+            summary['ocr_passes'] += receipt.pop('ocr_passes') or 0
+            stage = receipt['ocr_stage']
+            summary['ocr_stages'][stage] = summary['ocr_stages'].get(stage, 0) + 1
+            summary['receipts'] += 1
+            summary['items'] += len(receipt['items'])
+            
+            elapsed = time.perf_counter() - start
+            print(f"[{summary['processed']}/{len(pending)}] {path}: "
+                  f"{len(receipt['items'])} items "
+                  f"({summary['processed'] / elapsed:.2f} receipts/s)", file=out)
+            
+            if len(batch) >= batch_size:
+                flush()
+        
+        flush()
+    
+    summary['seconds'] = time.perf_counter() - start
+    rate = summary['processed'] / summary['seconds'] if summary['seconds'] else 0.0
+    print(f"Ingested {summary['receipts']} receipts ({summary['items']} items) from "
+          f"{summary['processed']} files in {summary['seconds']:.1f}s: "
+          f"{rate:.2f} receipts/s, {summary['failed']} failed", file=out)
+    if summary['save_seconds']:
+        rows = summary['receipts'] + summary['items']
+        print(f"Database writes: {rows / summary['save_seconds']:.0f} rows/s", file=out)
+    if cascade:
+        ocr_count = sum(summary['ocr_stages'].values())
+        print(f"OCR cascade: {summary['ocr_passes'] / max(ocr_count, 1):.2f} passes/receipt, "
+              f"accepted at {summary['ocr_stages']}", file=out)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch ingest receipt images into the grocery database")
+    parser.add_argument('inputs', nargs='+', help="Image files, directories or glob patterns")
+    parser.add_argument('--db', default='grocery_manager.db', help="SQLite database path")
+    parser.add_argument('--workers', type=int, default=None, help="OCR worker processes (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=50, help="Receipts saved per transaction")
+    parser.add_argument('--no-resume', action='store_true', help="Reprocess files that were already ingested")
+    parser.add_argument('--single-pass', action='store_true', help="Use the single-pass OCR layout mode")
+    parser.add_argument('--cascade', action='store_true', help="Use the confidence-driven OCR config cascade")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    
+    summary = ingest(
+        args.inputs,
+        db_path=args.db,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        resume=not args.no_resume,
+        single_pass=args.single_pass,
+        cascade=True if args.cascade else None
+    )
+    return 1 if summary['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Receipt save throughput: save_receipt per receipt (one commit each) against
+save_receipts_bulk with batched transactions, in rows written per second.
+
+Usage: python benchmarks/bench_bulk_save.py [--receipts 20000] [--items-per-receipt 20] [--batch-size 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+def synthetic_receipts(count, items_per_receipt, seed=0):
+    """Receipt dicts shaped like the parser's output"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for _ in range(count):
+        items = [{
+            'item': f"ITEM {rng.randrange(5000)}",
+            'price': round(rng.uniform(0.5, 20), 2),
+            'category': 'Other',
+            'nutrition_score': rng.randint(1, 10)
+        } for _ in range(items_per_receipt)]
+        yield {
+            'date': start + timedelta(minutes=rng.randrange(365 * 24 * 60)),
+            'total_amount': round(sum(item['price'] for item in items), 2),
+            'items': items
+        }
+
+def fresh_database(path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return Database(path)
+
+def report(label, rows, elapsed):
+    print(f"{label:<32} {rows:9d} rows {elapsed:8.2f}s  {rows / elapsed:10.0f} rows/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--receipts', type=int, default=20000)
+    parser.add_argument('--items-per-receipt', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--single-receipts', type=int, default=1000,
+                        help="receipts saved one at a time for the baseline")
+    parser.add_argument('--path', default='/tmp/bench_bulk_save.db')
+    args = parser.parse_args()
+    
+    # Generated up front so only the database writes are timed
+    single = list(synthetic_receipts(args.single_receipts, args.items_per_receipt))
+    bulk = list(synthetic_receipts(args.receipts, args.items_per_receipt))
+    
+    db = fresh_database(args.path)
+    start = time.perf_counter()
+    for receipt in single:
+        db.save_receipt(receipt['date'], receipt['total_amount'], receipt['items'])
+    report("save_receipt (commit each)", args.single_receipts * (args.items_per_receipt + 1),
+           time.perf_counter() - start)
+    db.connections.close()
+    
+    db = fresh_database(args.path)
+    last = {}
+    db.save_receipts_bulk(bulk, batch_size=args.batch_size, progress=last.update)
+    report(f"save_receipts_bulk (batch {args.batch_size})", last['receipts'] + last['items'], last['seconds'])
+    print(f"{last['batches']} batches, {last['items']} items")
+    db.connections.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+On-disk NutritionCatalog against an in-memory dict of the same synthetic
+catalog: Python memory held, exact lookup latency, score queries and
+NutritionAnalyzer fuzzy matching of misspelled names served from the file.
+
+Usage: python benchmarks/bench_catalog.py [--entries 300000] [--misses 1000] [--path /tmp/bench_catalog.db]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.nutrition_catalog import NutritionCatalog
+from data.nutritional_data import BUILTIN_NUTRITIONAL_DATA
+from nutrition_analyzer import NutritionAnalyzer
+
+def synthetic_records(count, seed=0):
+    """(name, info) records derived from the built-in items"""
+    rng = random.Random(seed)
+    base = list(BUILTIN_NUTRITIONAL_DATA.items())
+    for position in range(count):
+        name, info = base[position % len(base)]
+        yield f"{name} {position}", {
+            'score': rng.randint(1, 10),
+            'category': info['category'],
+            'benefits': info['benefits'],
+            'concerns': info['concerns']
+        }
+
+def measure(label, function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed * 1000:9.1f}ms  peak {peak / 1e6:7.1f}MB")
+    return result
+
+def misspell(name, rng):
+    """name with one letter of its longest word dropped"""
+    word = max(name.split(), key=len)
+    cut = rng.randrange(1, len(word))
+    return name.replace(word, word[:cut] + word[cut + 1:], 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=300000)
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--misses', type=int, default=1000)
+    parser.add_argument('--path', default='/tmp/bench_catalog.db')
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    NutritionCatalog.create(args.path, synthetic_records(args.entries))
+    print(f"built {args.entries} items in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(args.path) / 1e6:.1f}MB on disk)")
+    
+    in_memory = measure("load dict", lambda: dict(synthetic_records(args.entries)))
+    catalog = measure("open catalog", lambda: NutritionCatalog(args.path))
+    
+    rng = random.Random(1)
+    names = [f"{name} {rng.randrange(args.entries)}" for name in
+             (rng.choice(list(BUILTIN_NUTRITIONAL_DATA)) for _ in range(args.lookups))]
+    measure(f"dict lookups ({args.lookups})", lambda: [in_memory.get(name) for name in names])
+    measure(f"catalog lookups ({args.lookups})", lambda: [catalog.get(name) for name in names])
+    measure("catalog score range 9-10", lambda: catalog.items_by_score_range(9, 10))
+    measure("catalog healthiest 10", lambda: catalog.highest_scoring(10))
+    measure("dict healthiest 10", lambda: dict(sorted(in_memory.items(), key=lambda x: x[1]['score'],
+                                                       reverse=True)[:10]))
+    
+    analyzer = NutritionAnalyzer(nutritional_db=catalog)
+    misses = [f"{misspell(name, rng)} {rng.randrange(args.entries)}" for name in
+              (rng.choice(list(BUILTIN_NUTRITIONAL_DATA)) for _ in range(args.misses + 1))]
+    measure("analyzer first fuzzy miss", lambda: analyzer.get_nutrition_score(misses[0]))
+    measure(f"analyzer fuzzy misses ({args.misses})",
+            lambda: [analyzer.get_nutrition_score(name) for name in misses[1:]])
+
+if __name__ == '__main__':
+    main()
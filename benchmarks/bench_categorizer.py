@@ -0,0 +1,102 @@
+"""
+ItemCategorizer.categorize_item throughput against the previous linear-scan
+implementation, on synthetic item names. Also checks that both agree.
+
+Usage: python benchmarks/bench_categorizer.py [--items 100000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from item_categorizer import ItemCategorizer
+
+NOISE_WORDS = ['organic', 'fresh', 'lg', 'ea', 'value', 'pack', 'store brand', 'xtra', '2%', 'whole']
+
+def linear_scan_categorize(categorizer, item_name):
+    """Reference: the original keyword scan with the nested fuzzy fallback"""
+    if not item_name:
+        return 'Other'
+    
+    item_lower = item_name.lower()
+    
+    for keyword, category in categorizer.keyword_to_category.items():
+        if keyword in item_lower:
+            return category
+    
+    for category, keywords in categorizer.categories.items():
+        for keyword in keywords:
+            item_words = re.findall(r'\b\w+\b', item_lower)
+            for word in item_words:
+                if keyword in word or word in keyword:
+                    if len(word) > 2 and len(keyword) > 2:
+                        return category
+    
+    if re.search(r'\b(organic|fresh|raw)\b', item_lower):
+        if any(veg in item_lower for veg in ['salad', 'greens', 'mix']):
+            return 'Vegetables'
+        if any(fruit in item_lower for fruit in ['apple', 'berry', 'fruit']):
+            return 'Fruits'
+    
+    if re.search(r'\b(ground|lean|boneless)\b', item_lower):
+        return 'Meat'
+    
+    if re.search(r'\b(whole|skim|2%|1%)\s*milk\b', item_lower):
+        return 'Dairy'
+    
+    if re.search(r'\b(wheat|white|grain)\s*bread\b', item_lower):
+        return 'Bakery'
+    
+    return 'Other'
+
+def synthetic_item_names(categorizer, count, seed=0):
+    """Receipt-style item names: keywords, OCR-truncated fragments and noise"""
+    rng = random.Random(seed)
+    keywords = list(categorizer.keyword_to_category)
+    names = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(1, 4)):
+            roll = rng.random()
+            if roll < 0.4:
+                words.append(rng.choice(keywords))
+            elif roll < 0.7:
+                keyword = rng.choice(keywords)
+                start = rng.randint(0, len(keyword) // 2)
+                words.append(keyword[start:start + rng.randint(3, 6)])
+            else:
+                words.append(rng.choice(NOISE_WORDS))
+        name = ' '.join(words)
+        names.append(name.upper() if rng.random() < 0.5 else name.title())
+    return names
+
+def time_call(function, names):
+    start = time.perf_counter()
+    results = [function(name) for name in names]
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000)
+    args = parser.parse_args()
+    
+    categorizer = ItemCategorizer()
+    names = synthetic_item_names(categorizer, args.items)
+    
+    baseline, baseline_time = time_call(lambda n: linear_scan_categorize(categorizer, n), names)
+    results, matcher_time = time_call(categorizer.categorize_item, names)
+    
+    mismatches = sum(1 for a, b in zip(baseline, results) if a != b)
+    print(f"items:        {args.items}")
+    print(f"linear scan:  {baseline_time:.3f}s ({args.items / baseline_time:,.0f} items/s)")
+    print(f"matcher:      {matcher_time:.3f}s ({args.items / matcher_time:,.0f} items/s)")
+    print(f"speedup:      {baseline_time / matcher_time:.1f}x")
+    print(f"mismatches:   {mismatches}")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
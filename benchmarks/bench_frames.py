@@ -0,0 +1,85 @@
+"""
+Reading items and receipts as typed DataFrames against the list-of-dicts
+getters followed by the DataFrame rebuild the app used to do, and
+aggregating item history in chunks against loading it whole.
+
+Usage: python benchmarks/bench_frames.py [--items 500000] [--path /tmp/bench_frames.db]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from item_categorizer import ItemCategorizer
+from item_stats import ItemStats
+
+CATEGORIES = ItemCategorizer().get_all_categories()
+
+def populate(db, item_count, items_per_receipt=10, seed=0):
+    """Insert synthetic receipts spread over three years"""
+    rng = random.Random(seed)
+    start = datetime(2022, 1, 1)
+    receipt_count = item_count // items_per_receipt
+    
+    with db.connections.write() as cursor:
+        cursor.executemany('INSERT INTO receipts (id, date, total_amount) VALUES (?, ?, ?)', (
+            (receipt_id, start + timedelta(minutes=rng.randrange(3 * 365 * 24 * 60)), 0.0)
+            for receipt_id in range(1, receipt_count + 1)
+        ))
+        cursor.executemany('''
+            INSERT INTO items (receipt_id, item_name, price, category, nutrition_score)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (
+            (position // items_per_receipt + 1, f"ITEM {rng.randrange(5000)}", round(rng.uniform(0.5, 20), 2),
+             rng.choice(CATEGORIES), rng.randint(1, 10))
+            for position in range(receipt_count * items_per_receipt)
+        ))
+        cursor.execute('UPDATE receipts SET total_amount = '
+                       '(SELECT SUM(price) FROM items WHERE items.receipt_id = receipts.id)')
+        cursor.execute('ANALYZE')
+
+def measure(label, function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} {elapsed * 1000:9.1f}ms  peak {peak / 1e6:7.1f}MB")
+    return result
+
+def records_then_frame(records, date_column):
+    """What callers did with the dict getters"""
+    df = pd.DataFrame(records)
+    df[date_column] = pd.to_datetime(df[date_column])
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=500000)
+    parser.add_argument('--path', default='/tmp/bench_frames.db')
+    args = parser.parse_args()
+    
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.path + suffix):
+            os.remove(args.path + suffix)
+    db = Database(args.path)
+    populate(db, args.items)
+    
+    measure("items: records + DataFrame", lambda: records_then_frame(db.get_all_items(), 'receipt_date'))
+    measure("items: get_all_items_df", db.get_all_items_df)
+    measure("items: ItemStats over chunks", lambda: ItemStats.from_chunks(db.iter_items_df()))
+    measure("receipts: records + DataFrame", lambda: records_then_frame(db.get_receipts(), 'date'))
+    measure("receipts: get_receipts_df", db.get_receipts_df)
+    db.connections.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+NutritionAnalyzer fuzzy-match lookup speed with the token index against the
+previous linear scan, on a synthetic product database. Also checks that both
+pick the same item.
+
+Usage: python benchmarks/bench_nutrition.py [--entries 20000] [--queries 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nutrition_analyzer import NutritionAnalyzer
+from data.nutritional_data import NUTRITIONAL_DATABASE
+
+BRANDS = ['gv', 'kirkland', 'great value', 'organic', 'store', 'fresh', 'select', 'market', 'farm']
+SIZES = ['12ct', '1lb', '2lb', '16oz', '32oz', 'family size', 'lg', 'sm', '6pk']
+
+def linear_scan_similar(analyzer, item_lower):
+    """Reference: the original scan over every database item"""
+    for db_item in analyzer.nutritional_db:
+        if analyzer._items_similar(item_lower, db_item):
+            return db_item
+    return None
+
+def synthetic_database(count, seed=0):
+    """Product names built from the real item names plus brands and sizes"""
+    rng = random.Random(seed)
+    base = list(NUTRITIONAL_DATABASE)
+    database = dict(NUTRITIONAL_DATABASE)
+    while len(database) < count:
+        words = [rng.choice(base)]
+        if rng.random() < 0.7:
+            words.insert(0, rng.choice(BRANDS))
+        if rng.random() < 0.5:
+            words.append(rng.choice(SIZES))
+        if rng.random() < 0.3:
+            words.append(str(rng.randint(1, 999)))
+        database.setdefault(' '.join(words), {'score': rng.randint(1, 10)})
+    return database
+
+def synthetic_queries(database, count, seed=1):
+    """Receipt item names that mostly miss the exact lookup"""
+    rng = random.Random(seed)
+    names = list(database)
+    queries = []
+    for _ in range(count):
+        words = rng.choice(names).split()
+        roll = rng.random()
+        if roll < 0.4:
+            words.append(rng.choice(SIZES))
+        elif roll < 0.7 and len(words) > 1:
+            words.pop(rng.randrange(len(words)))
+        else:
+            words = ['xq' + word for word in words]
+        queries.append(' '.join(words))
+    return queries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+    
+    analyzer = NutritionAnalyzer()
+    analyzer.nutritional_db = synthetic_database(args.entries)
+    start = time.perf_counter()
+    analyzer.build_index()
+    index_time = time.perf_counter() - start
+    queries = synthetic_queries(analyzer.nutritional_db, args.queries)
+    
+    start = time.perf_counter()
+    baseline = [linear_scan_similar(analyzer, query) for query in queries]
+    baseline_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    results = [analyzer.find_similar_item(query) for query in queries]
+    indexed_time = time.perf_counter() - start
+    
+    mismatches = sum(1 for a, b in zip(baseline, results) if a != b)
+    print(f"entries:      {len(analyzer.nutritional_db)} (index built in {index_time * 1000:.0f}ms)")
+    print(f"queries:      {args.queries}")
+    print(f"linear scan:  {baseline_time / args.queries * 1000:.3f}ms/query")
+    print(f"token index:  {indexed_time / args.queries * 1000:.3f}ms/query")
+    print(f"speedup:      {baseline_time / indexed_time:.1f}x")
+    print(f"mismatches:   {mismatches}")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Receipt line parser throughput on large synthetic receipt text.
+
+Usage: python benchmarks/bench_parser.py [--lines 200000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_processor import OCRProcessor
+
+ITEM_NAMES = [
+    'WHOLE MILK', 'BANANAS', 'ORGANIC SPINACH', 'GROUND BEEF 1 LB', 'WHEAT BREAD',
+    'GREEK YOGURT 32 OZ', 'EGGS 12 CT', 'CHEDDAR CHEESE', 'APPLE JUICE', 'POTATO CHIPS',
+    'FROZEN PIZZA', 'CHICKEN BREAST', 'BROCCOLI CROWNS', 'PASTA SAUCE', 'COFFEE BEANS PKG'
+]
+
+NOISE_LINES = [
+    'SUBTOTAL 45.67', 'TAX 3.21', 'TOTAL 48.88', 'VISA **** 1234', 'THANK YOU FOR SHOPPING',
+    '12/31/2024', '10:45', 'STORE 0423', '------------', 'CASHIER: JANE', 'x7', 'ab'
+]
+
+def synthetic_receipt_text(line_count, seed=0):
+    """Receipt-like text mixing item lines, split name/price lines and noise"""
+    rng = random.Random(seed)
+    lines = []
+    while len(lines) < line_count:
+        roll = rng.random()
+        name = rng.choice(ITEM_NAMES)
+        price = f"{rng.uniform(0.5, 60):.2f}"
+        if roll < 0.45:
+            lines.append(f"{name} {price}")
+        elif roll < 0.55:
+            lines.append(f"{name} ${price}")
+        elif roll < 0.65:
+            lines.append(f"{rng.randint(1, 5)} {name}  {price}")
+        elif roll < 0.75:
+            lines.append(name)
+            lines.append(price)
+        else:
+            lines.append(rng.choice(NOISE_LINES))
+    return '\n'.join(lines[:line_count])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    ocr = OCRProcessor()
+    text = synthetic_receipt_text(args.lines)
+    
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        items = ocr.parse_items_and_prices(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    
+    print(f"lines:        {args.lines}")
+    print(f"unique items: {len(items)}")
+    print(f"best time:    {best:.3f}s")
+    print(f"throughput:   {args.lines / best:,.0f} lines/s")
+
+if __name__ == '__main__':
+    main()
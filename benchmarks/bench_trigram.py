@@ -0,0 +1,82 @@
+"""
+TrigramIndex query latency on a large synthetic catalog of product names,
+with OCR-style misspelled queries.
+
+Usage: python benchmarks/bench_trigram.py [--entries 100000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trigram_index import TrigramIndex
+from data.nutritional_data import NUTRITIONAL_DATABASE
+from item_categorizer import ItemCategorizer
+
+BRANDS = ['gv', 'kirkland', 'great value', 'organic', 'store', 'fresh', 'select', 'market', 'farm']
+SIZES = ['12ct', '1lb', '2lb', '16oz', '32oz', 'family size', 'lg', 'sm', '6pk']
+
+def synthetic_catalog(count, seed=0):
+    """Product names built from the nutrition items and lexicon keywords"""
+    rng = random.Random(seed)
+    base = list(NUTRITIONAL_DATABASE) + list(ItemCategorizer().keyword_to_category)
+    names = set(base)
+    while len(names) < count:
+        words = [rng.choice(base)]
+        if rng.random() < 0.7:
+            words.insert(0, rng.choice(BRANDS))
+        if rng.random() < 0.5:
+            words.append(rng.choice(SIZES))
+        words.append(str(rng.randint(1, 9999)))
+        names.add(' '.join(words))
+    return sorted(names)
+
+def misspell(name, rng):
+    """Drop, double or swap a letter, the way OCR misreads receipts"""
+    letters = list(name.upper())
+    position = rng.randrange(len(letters))
+    roll = rng.random()
+    if roll < 0.4:
+        del letters[position]
+    elif roll < 0.7:
+        letters.insert(position, letters[position])
+    elif position + 1 < len(letters):
+        letters[position], letters[position + 1] = letters[position + 1], letters[position]
+    return ''.join(letters)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+    
+    catalog = synthetic_catalog(args.entries)
+    start = time.perf_counter()
+    index = TrigramIndex(catalog)
+    build_time = time.perf_counter() - start
+    
+    rng = random.Random(1)
+    queries = [misspell(rng.choice(catalog), rng) for _ in range(args.queries)]
+    
+    latencies = []
+    found = 0
+    for query in queries:
+        start = time.perf_counter()
+        results = index.query(query, k=args.k)
+        latencies.append(time.perf_counter() - start)
+        found += bool(results)
+    latencies.sort()
+    
+    print(f"entries:      {len(catalog)} (index built in {build_time:.2f}s)")
+    print(f"queries:      {args.queries}, top-{args.k}, cutoff {index.cutoff}")
+    print(f"mean:         {sum(latencies) / len(latencies) * 1000:.3f}ms")
+    print(f"p50:          {latencies[len(latencies) // 2] * 1000:.3f}ms")
+    print(f"p99:          {latencies[int(len(latencies) * 0.99)] * 1000:.3f}ms")
+    print(f"with result:  {found / args.queries:.1%}")
+
+if __name__ == '__main__':
+    main()
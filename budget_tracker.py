@@ -1,5 +1,4 @@
 from datetime import datetime, timedelta
-import pandas as pd
 import calendar
 
 class BudgetTracker:
@@ -20,13 +19,10 @@ class BudgetTracker:
         start_of_month = datetime(now.year, now.month, 1)
         end_of_month = datetime(now.year, now.month, calendar.monthrange(now.year, now.month)[1], 23, 59, 59)
         
-        receipts = self.db.get_receipts()
-        if not receipts:
+        df = self.db.get_receipts_df()
+        if df.empty:
             return 0.0
         
-        df = pd.DataFrame(receipts)
-        df['date'] = pd.to_datetime(df['date'])
-        
         current_month_receipts = df[
             (df['date'] >= start_of_month) & (df['date'] <= end_of_month)
         ]
@@ -38,13 +34,10 @@ class BudgetTracker:
         now = datetime.now()
         start_of_month = datetime(now.year, now.month, 1)
         
-        receipts = self.db.get_receipts()
-        if not receipts:
+        df = self.db.get_receipts_df()
+        if df.empty:
             return []
         
-        df = pd.DataFrame(receipts)
-        df['date'] = pd.to_datetime(df['date'])
-        
         # Filter to current month
         current_month_receipts = df[df['date'] >= start_of_month]
         if current_month_receipts.empty:
@@ -65,17 +58,13 @@ class BudgetTracker:
         start_of_month = datetime(now.year, now.month, 1)
         end_of_month = datetime(now.year, now.month, calendar.monthrange(now.year, now.month)[1], 23, 59, 59)
         
-        category_spending = self.db.get_spending_by_category(start_of_month, end_of_month)
+        category_spending = self.db.get_spending_by_category_df(start_of_month, end_of_month)
         
         # Format for display
-        formatted_spending = []
-        for item in category_spending:
-            formatted_spending.append({
-                'category': item['category'],
-                'amount': item['total_amount']
-            })
+        formatted_spending = category_spending.rename(columns={'total_amount': 'amount'})
+        formatted_spending['category'] = formatted_spending['category'].astype(object)
         
-        return formatted_spending
+        return formatted_spending[['category', 'amount']].to_dict('records')
     
     def get_budget_alerts(self):
         """Get budget alerts and warnings"""
@@ -108,13 +97,10 @@ class BudgetTracker:
     
     def get_spending_trends(self, months=6):
         """Get spending trends over the last N months"""
-        receipts = self.db.get_receipts()
-        if not receipts:
+        df = self.db.get_receipts_df()
+        if df.empty:
             return []
         
-        df = pd.DataFrame(receipts)
-        df['date'] = pd.to_datetime(df['date'])
-        
         # Filter to last N months
         cutoff_date = datetime.now() - timedelta(days=months * 30)
         recent_receipts = df[df['date'] >= cutoff_date]
@@ -0,0 +1,193 @@
+import os
+import pickle
+import threading
+from datetime import datetime
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+# Non-food receipt lines, trained as 'Other' so the model has somewhere to
+# put names that look like no food category
+OTHER_KEYWORDS = [
+    'paper towels', 'toilet paper', 'tissues', 'napkins', 'paper plates', 'cups',
+    'dish soap', 'hand soap', 'soap', 'detergent', 'laundry', 'bleach', 'cleaner',
+    'disinfectant', 'sponge', 'trash bags', 'garbage bags', 'aluminum foil',
+    'plastic wrap', 'zip bags', 'batteries', 'light bulb', 'shampoo', 'conditioner',
+    'toothpaste', 'toothbrush', 'deodorant', 'razor', 'lotion', 'sunscreen',
+    'vitamins', 'medicine', 'pharmacy', 'diapers', 'wipes', 'pet food', 'cat litter',
+    'dog treats', 'charcoal', 'candles', 'flowers', 'magazine', 'greeting card',
+    'gift card', 'bag fee', 'bottle deposit', 'sales tax', 'coupon', 'discount'
+]
+
+class CategoryModel:
+    """Learned item categorizer: character n-gram TF-IDF + multinomial naive Bayes
+    
+    Trained from the saved items (including categories corrected in the data
+    editor) plus the keyword lexicon, persisted to disk and loaded lazily on
+    the first prediction. Training runs on a background thread so it never
+    blocks the upload path.
+    """
+    
+    def __init__(self, model_path="models/category_model.pkl", min_probability=0.5,
+                 batch_size=1000, retrain_after=25):
+        self.model_path = model_path
+        # Predictions less certain than this fall back to 'Other'
+        self.min_probability = min_probability
+        # Names vectorized per sparse prediction batch
+        self.batch_size = batch_size
+        # New labeled items needed before maybe_retrain starts a training run
+        self.retrain_after = retrain_after
+        
+        self._pipeline = None
+        self._metadata = {}
+        # Incremented whenever a different trained model is put in use
+        self.version = 0
+        self._loaded_mtime = None
+        self._load_lock = threading.Lock()
+        self._training = threading.Lock()
+    
+    def _build_pipeline(self):
+        """Character n-grams within word boundaries hold up against OCR misspellings"""
+        return Pipeline([
+            ('tfidf', TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4),
+                                      lowercase=True, sublinear_tf=True, dtype=np.float32)),
+            ('nb', MultinomialNB(alpha=0.1))
+        ])
+    
+    def training_data(self, database, categorizer):
+        """(names, labels, sample weights) from saved items plus the keyword lexicon
+        
+        Saved items keep their category, 'Other' included.
+        """
+        names, labels, weights = [], [], []
+        
+        for row in database.get_category_labels():
+            if row['category'] and row['item_name']:
+                names.append(row['item_name'].lower())
+                labels.append(row['category'])
+                weights.append(float(row['count']))
+        
+        for category, keywords in categorizer.categories.items():
+            for keyword in keywords:
+                names.append(keyword)
+                labels.append(category)
+                weights.append(1.0)
+        
+        # 'Other' is a class of its own, so non-food names are not forced
+        # into the nearest food category
+        for keyword in OTHER_KEYWORDS:
+            names.append(keyword)
+            labels.append('Other')
+            weights.append(1.0)
+        
+        return names, labels, weights
+    
+    def train(self, database, categorizer):
+        """Fit the model and save it to model_path; returns the training metadata"""
+        names, labels, weights = self.training_data(database, categorizer)
+        if len(set(labels)) < 2:
+            return None
+        
+        pipeline = self._build_pipeline()
+        pipeline.fit(names, labels, nb__sample_weight=weights)
+        
+        metadata = {
+            'trained_at': datetime.now().isoformat(),
+            'labeled_items': database.get_labeled_item_count(),
+            'samples': len(names),
+            'categories': [str(category) for category in pipeline.classes_]
+        }
+        
+        # Write atomically so a concurrent lazy load never sees a partial file
+        directory = os.path.dirname(self.model_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.model_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'pipeline': pipeline, 'metadata': metadata}, f)
+        os.replace(temp_path, self.model_path)
+        
+        with self._load_lock:
+            self._pipeline = pipeline
+            self._metadata = metadata
+            self.version += 1
+            self._loaded_mtime = os.path.getmtime(self.model_path)
+        return metadata
+    
+    def train_async(self, database, categorizer):
+        """Train on a background thread; returns False if a training run is already going"""
+        if not self._training.acquire(blocking=False):
+            return False
+        
+        def run():
+            try:
+                self.train(database, categorizer)
+            except Exception as e:
+                print(f"Error training category model: {e}")
+            finally:
+                self._training.release()
+        
+        threading.Thread(target=run, daemon=True).start()
+        return True
+    
+    def maybe_retrain(self, database, categorizer):
+        """Start background training when enough new labeled items have been saved"""
+        self._ensure_loaded()
+        trained_on = self._metadata.get('labeled_items', 0) if self._pipeline is not None else -1
+        if database.get_labeled_item_count() - trained_on >= self.retrain_after or trained_on < 0:
+            return self.train_async(database, categorizer)
+        return False
+    
+    def _ensure_loaded(self):
+        """Load the saved model on first use, or again if the file was retrained elsewhere"""
+        try:
+            mtime = os.path.getmtime(self.model_path)
+        except OSError:
+            return self._pipeline is not None
+        
+        if mtime != self._loaded_mtime:
+            with self._load_lock:
+                if mtime != self._loaded_mtime:
+                    try:
+                        with open(self.model_path, 'rb') as f:
+                            saved = pickle.load(f)
+                        self._pipeline = saved['pipeline']
+                        self._metadata = saved['metadata']
+                        self.version += 1
+                    except Exception as e:
+                        print(f"Error loading category model: {e}")
+                    self._loaded_mtime = mtime
+        
+        return self._pipeline is not None
+    
+    def is_available(self):
+        """Check whether a trained model exists"""
+        return self._ensure_loaded()
+    
+    def predict_many(self, names):
+        """Predict categories for a list of names (None where the model is unsure)"""
+        if not names or not self._ensure_loaded():
+            return [None] * len(names)
+        
+        pipeline = self._pipeline
+        vectorizer = pipeline.named_steps['tfidf']
+        classifier = pipeline.named_steps['nb']
+        
+        predictions = []
+        for start in range(0, len(names), self.batch_size):
+            batch = [name.lower() for name in names[start:start + self.batch_size]]
+            # Sparse TF-IDF matrix straight into the classifier
+            probabilities = classifier.predict_proba(vectorizer.transform(batch))
+            best = probabilities.argmax(axis=1)
+            for row, column in enumerate(best):
+                if probabilities[row, column] >= self.min_probability:
+                    predictions.append(str(classifier.classes_[column]))
+                else:
+                    predictions.append(None)
+        
+        return predictions
+    
+    def predict(self, name):
+        """Predict the category of one name (None where the model is unsure)"""
+        return self.predict_many([name])[0]
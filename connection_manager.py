@@ -0,0 +1,151 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+class ConnectionManager:
+    """Long-lived SQLite connections shared by everything using one database file
+    
+    The database runs in WAL mode, so readers never block the writer or each
+    other. Writes go through a single writer connection guarded by a lock
+    (SQLite allows one writer at a time anyway); reads use a small pool of
+    read-only connections. Connections keep their prepared statement caches
+    for the life of the process.
+    """
+    
+    def __init__(self, db_path, max_readers=4, cache_size_kb=16384, mmap_size=256 * 1024 * 1024,
+                 busy_timeout_ms=5000, statement_cache_size=256):
+        self.db_path = db_path
+        self.max_readers = max_readers
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache_size = statement_cache_size
+        # Called with every SQL statement run on any connection (see trace())
+        self._trace_callback = None
+        
+        self._lock = threading.RLock()
+        self._write_lock = threading.RLock()
+        self._reset()
+    
+    def _reset(self):
+        """Forget all connections (also used after a fork, where they can't be shared)"""
+        self._pid = os.getpid()
+        self._writer = None
+        self._idle_readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._all = []
+    
+    def _check_process(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+    
+    def _connect(self, read_only=False):
+        """Open a connection with the tuned pragmas"""
+        if read_only:
+            conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False,
+                                   cached_statements=self.statement_cache_size)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                   cached_statements=self.statement_cache_size)
+        
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        # Negative cache_size is in KiB
+        conn.execute(f'PRAGMA cache_size = -{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+        else:
+            conn.execute('PRAGMA journal_mode = WAL')
+            # Durable at checkpoints; a crash can lose only the last commits, never corrupt
+            conn.execute('PRAGMA synchronous = NORMAL')
+        if self._trace_callback is not None:
+            conn.set_trace_callback(self._trace_callback)
+        
+        with self._lock:
+            self._all.append(conn)
+        return conn
+    
+    def writer(self):
+        """The writer connection (use inside write() to hold the write lock)"""
+        self._check_process()
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = self._connect()
+        return self._writer
+    
+    @contextmanager
+    def write(self):
+        """Cursor on the writer connection in a transaction: committed on success, rolled back on error"""
+        with self._write_lock:
+            conn = self.writer()
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    @contextmanager
+    def read(self):
+        """A read-only connection from the pool"""
+        self._check_process()
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn is not self._writer:
+                self._idle_readers.put(conn)
+    
+    def _acquire_reader(self):
+        try:
+            return self._idle_readers.get_nowait()
+        except queue.Empty:
+            pass
+        
+        if self.db_path in (':memory:', ''):
+            # Other connections would each get their own empty database
+            return self.writer()
+        
+        with self._lock:
+            create = self._reader_count < self.max_readers
+            if create:
+                self._reader_count += 1
+        if not create:
+            return self._idle_readers.get()
+        
+        # The writer sets up WAL mode, which read-only connections can't do
+        self.writer()
+        try:
+            return self._connect(read_only=True)
+        except sqlite3.OperationalError:
+            # e.g. no permission to create the shared-memory file
+            with self._lock:
+                self._reader_count -= 1
+            return self.writer()
+    
+    def trace(self, callback):
+        """Call callback(sql) for every statement run on current and future connections (None to stop)"""
+        with self._lock:
+            self._trace_callback = callback
+            for conn in self._all:
+                conn.set_trace_callback(callback)
+    
+    def close(self):
+        """Close every connection; new ones are opened on next use"""
+        with self._lock:
+            connections = self._all
+            self._reset()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
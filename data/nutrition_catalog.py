@@ -0,0 +1,308 @@
+"""
+On-disk nutrition catalog for product databases too large to keep in memory.
+
+The catalog is a SQLite file with one row per item name. It is read-only at
+run time and records are fetched on lookup, so only the rows actually used
+are ever materialized. NutritionCatalog behaves like the NUTRITIONAL_DATABASE
+dict (lookups, membership, iteration in insertion order) and adds indexed
+score queries.
+
+Fuzzy matching is served from the file too: the tokens of every name and
+the character trigrams of every distinct word are stored as posting
+tables, so NutritionAnalyzer never has to load the names. Catalogs built
+before these tables existed still work, but fuzzy matching then indexes
+every name in memory; rebuild them to avoid that.
+
+Build one with: python -m data.nutrition_catalog catalog.db [items.csv]
+The CSV has name,score,category,benefits,concerns columns, with the benefits
+and concerns separated by '|'. Without a CSV the built-in items are used.
+"""
+import csv
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import Mapping
+from trigram_index import WORD_PATTERN, trigrams
+
+class NutritionCatalog(Mapping):
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise Exception(f"Nutrition catalog not found: {path}")
+        self.path = path
+        # Changes only when the file is rebuilt; open a new catalog to pick it up
+        stat = os.stat(path)
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self._local = threading.local()
+        self._length = None
+        self._has_word_index = None
+    
+    @classmethod
+    def create(cls, path, records, batch_size=10000):
+        """Write (name, info) records to a new catalog file and open it
+        
+        Names are stored lower-cased; records keep their order for iteration.
+        """
+        temp_path = path + '.tmp'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        conn = sqlite3.connect(temp_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE catalog (
+                    position INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE,
+                    score INTEGER NOT NULL,
+                    category TEXT,
+                    benefits TEXT,
+                    concerns TEXT
+                )
+            ''')
+            
+            batch = []
+            for position, (name, info) in enumerate(records):
+                batch.append((
+                    position,
+                    name.lower(),
+                    info['score'],
+                    info.get('category', 'Unknown'),
+                    json.dumps(info.get('benefits', [])),
+                    json.dumps(info.get('concerns', []))
+                ))
+                if len(batch) >= batch_size:
+                    cursor.executemany('INSERT OR REPLACE INTO catalog VALUES (?, ?, ?, ?, ?, ?)', batch)
+                    batch.clear()
+            cursor.executemany('INSERT OR REPLACE INTO catalog VALUES (?, ?, ?, ?, ?, ?)', batch)
+            
+            # Score queries walk these indexes instead of sorting the catalog
+            # (ties are broken by position in both directions)
+            cursor.execute('CREATE INDEX idx_catalog_score ON catalog (score, position)')
+            cursor.execute('CREATE INDEX idx_catalog_score_desc ON catalog (score DESC, position)')
+            
+            cls._create_word_index(conn, batch_size)
+            conn.commit()
+        finally:
+            conn.close()
+        
+        os.replace(temp_path, path)
+        return cls(path)
+    
+    @staticmethod
+    def _create_word_index(conn, batch_size):
+        """Token postings of every name and trigram postings of every word
+        
+        Built from the stored rows, so names replaced by a later duplicate
+        are left out. Word ids follow first appearance in catalog order.
+        """
+        conn.execute('''
+            CREATE TABLE catalog_tokens (
+                token TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (token, position)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE catalog_words (
+                id INTEGER PRIMARY KEY,
+                word TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE catalog_word_trigrams (
+                gram TEXT NOT NULL,
+                word_id INTEGER NOT NULL,
+                PRIMARY KEY (gram, word_id)
+            ) WITHOUT ROWID
+        ''')
+        
+        words = {}
+        batch = []
+        for position, name in conn.execute('SELECT position, name FROM catalog ORDER BY position'):
+            tokens = set(WORD_PATTERN.findall(name))
+            for token in tokens:
+                batch.append((token, position, len(tokens)))
+                words.setdefault(token, len(words))
+            if len(batch) >= batch_size:
+                conn.executemany('INSERT INTO catalog_tokens VALUES (?, ?, ?)', batch)
+                batch.clear()
+        conn.executemany('INSERT INTO catalog_tokens VALUES (?, ?, ?)', batch)
+        
+        conn.executemany('INSERT INTO catalog_words VALUES (?, ?, ?)', (
+            (word_id, word, len(trigrams(word))) for word, word_id in words.items()
+        ))
+        conn.executemany('INSERT INTO catalog_word_trigrams VALUES (?, ?)', (
+            (gram, word_id) for word, word_id in words.items() for gram in trigrams(word)
+        ))
+    
+    def _connection(self):
+        """Read-only connection for the calling thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+            self._local.conn = conn
+        return conn
+    
+    def _record(self, row):
+        score, category, benefits, concerns = row
+        return {
+            'score': score,
+            'category': category,
+            'benefits': json.loads(benefits),
+            'concerns': json.loads(concerns)
+        }
+    
+    def __getitem__(self, name):
+        row = self._connection().execute(
+            'SELECT score, category, benefits, concerns FROM catalog WHERE name = ?', (name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return self._record(row)
+    
+    def __contains__(self, name):
+        return self._connection().execute(
+            'SELECT 1 FROM catalog WHERE name = ?', (name,)
+        ).fetchone() is not None
+    
+    def __len__(self):
+        if self._length is None:
+            self._length = self._connection().execute('SELECT COUNT(*) FROM catalog').fetchone()[0]
+        return self._length
+    
+    def __iter__(self):
+        # Streams names in insertion order without loading the records
+        cursor = self._connection().execute('SELECT name FROM catalog ORDER BY position')
+        for (name,) in cursor:
+            yield name
+    
+    def items(self):
+        """(name, info) pairs in insertion order, from a single query"""
+        cursor = self._connection().execute(
+            'SELECT name, score, category, benefits, concerns FROM catalog ORDER BY position'
+        )
+        for name, *row in cursor:
+            yield name, self._record(row)
+    
+    def score(self, name, default=None):
+        """Score of an item without decoding the rest of its record"""
+        row = self._connection().execute('SELECT score FROM catalog WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else default
+    
+    @property
+    def has_word_index(self):
+        """Whether the file has the token and word trigram tables"""
+        if self._has_word_index is None:
+            self._has_word_index = self._connection().execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catalog_word_trigrams'"
+            ).fetchone() is not None
+        return self._has_word_index
+    
+    def similar_name(self, tokens):
+        """First name, in catalog order, sharing over half of all tokens with tokens, or None"""
+        tokens = list(set(tokens))
+        if not tokens:
+            return None
+        placeholders = ', '.join('?' * len(tokens))
+        # Jaccard index > 0.5 of the two token sets
+        row = self._connection().execute(f'''
+            SELECT name FROM catalog WHERE position = (
+                SELECT position FROM catalog_tokens WHERE token IN ({placeholders})
+                GROUP BY position HAVING 2 * COUNT(*) > ? + size - COUNT(*)
+                ORDER BY position LIMIT 1
+            )
+        ''', (*tokens, len(tokens))).fetchone()
+        return row[0] if row else None
+    
+    def contains_word(self, text):
+        """Whether a catalog word longer than three characters occurs in text"""
+        parts = {text[start:end] for start in range(len(text)) for end in range(start + 4, len(text) + 1)}
+        if not parts:
+            return False
+        placeholders = ', '.join('?' * len(parts))
+        return self._connection().execute(
+            f'SELECT 1 FROM catalog_words WHERE word IN ({placeholders}) LIMIT 1', tuple(parts)
+        ).fetchone() is not None
+    
+    def nearest_words(self, text, k=5, cutoff=0.4):
+        """Up to k (word, similarity) pairs of catalog words spelled most like text
+        
+        Similarity is computed as in TrigramIndex; equally similar words keep
+        catalog order.
+        """
+        grams = list(trigrams(text))
+        if not grams or k <= 0:
+            return []
+        size = len(grams)
+        # As in TrigramIndex, fewer shared trigrams than this can't reach cutoff
+        min_shared = max(1, math.ceil(cutoff * size - 1e-9))
+        placeholders = ', '.join('?' * len(grams))
+        return self._connection().execute(f'''
+            SELECT word, similarity FROM (
+                SELECT word, id, CAST(COUNT(*) AS REAL) / (? + size - COUNT(*)) AS similarity
+                FROM catalog_word_trigrams JOIN catalog_words ON catalog_words.id = word_id
+                WHERE gram IN ({placeholders})
+                GROUP BY word_id HAVING COUNT(*) >= ?
+            )
+            WHERE similarity >= ?
+            ORDER BY similarity DESC, id LIMIT ?
+        ''', (size, *grams, min_shared, cutoff, k)).fetchall()
+    
+    def _query_items(self, query, params):
+        cursor = self._connection().execute(query, params)
+        return {name: self._record(row) for name, *row in cursor}
+    
+    def items_by_score_range(self, min_score, max_score):
+        """{name: info} of items scoring between min_score and max_score, in catalog order"""
+        return self._query_items('''
+            SELECT name, score, category, benefits, concerns FROM catalog
+            WHERE score BETWEEN ? AND ? ORDER BY position
+        ''', (min_score, max_score))
+    
+    def highest_scoring(self, limit):
+        """{name: info} of the limit best-scoring items (ties in catalog order)"""
+        return self._query_items('''
+            SELECT name, score, category, benefits, concerns FROM catalog
+            ORDER BY score DESC, position LIMIT ?
+        ''', (limit,))
+    
+    def lowest_scoring(self, limit):
+        """{name: info} of the limit worst-scoring items (ties in catalog order)"""
+        return self._query_items('''
+            SELECT name, score, category, benefits, concerns FROM catalog
+            ORDER BY score, position LIMIT ?
+        ''', (limit,))
+
+def read_csv(path):
+    """(name, info) records from a catalog CSV file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield row['name'], {
+                'score': int(row['score']),
+                'category': row.get('category') or 'Unknown',
+                'benefits': [part for part in (row.get('benefits') or '').split('|') if part],
+                'concerns': [part for part in (row.get('concerns') or '').split('|') if part]
+            }
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(__doc__.strip())
+        return 1
+    
+    if len(argv) > 1:
+        records = read_csv(argv[1])
+    else:
+        from data.nutritional_data import BUILTIN_NUTRITIONAL_DATA
+        records = BUILTIN_NUTRITIONAL_DATA.items()
+    
+    catalog = NutritionCatalog.create(argv[0], records)
+    print(f"Wrote {len(catalog)} items to {argv[0]}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
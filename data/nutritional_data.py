@@ -1,9 +1,65 @@
 """
 Nutritional database with scoring and information for common grocery items.
 Score scale: 1-10 (10 being the healthiest)
+
+Set the NUTRITION_CATALOG environment variable to a catalog file built with
+data/nutrition_catalog.py to use a large on-disk catalog instead of the
+built-in items.
 """
+import os
+
+from data.nutrition_catalog import NutritionCatalog
+from data.score_index import ScoreIndex
 
-NUTRITIONAL_DATABASE = {
+class VersionedDict(dict):
+    """dict whose version attribute increases on every change
+    
+    Lets caches of derived results notice that the database was edited.
+    Mutating an entry in place is not seen; assign a new entry instead.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+    
+    def _changed(self):
+        self.version += 1
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+    
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+    
+    def __ior__(self, other):
+        super().__ior__(other)
+        self._changed()
+        return self
+    
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+    
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._changed()
+        return super().setdefault(key, default)
+    
+    def pop(self, key, *default):
+        self._changed()
+        return super().pop(key, *default)
+    
+    def popitem(self):
+        self._changed()
+        return super().popitem()
+    
+    def clear(self):
+        super().clear()
+        self._changed()
+
+BUILTIN_NUTRITIONAL_DATA = VersionedDict({
     # Fruits (High nutrition scores: 8-10)
     'apple': {
         'score': 9,
@@ -327,7 +383,16 @@ NUTRITIONAL_DATABASE = {
         'benefits': ['Protein', 'Fiber', 'Folate', 'Manganese'],
         'concerns': []
     }
-}
+})
+
+NUTRITION_CATALOG_PATH = os.environ.get('NUTRITION_CATALOG')
+if NUTRITION_CATALOG_PATH:
+    NUTRITIONAL_DATABASE = NutritionCatalog(NUTRITION_CATALOG_PATH)
+else:
+    NUTRITIONAL_DATABASE = BUILTIN_NUTRITIONAL_DATA
+
+# Built on the first score query
+_score_index = None
 
 def get_nutrition_info(item_name):
     """Get nutrition information for a specific item"""
@@ -338,26 +403,27 @@ def get_nutrition_info(item_name):
         'concerns': []
     })
 
+def _score_queries():
+    """Object answering score queries for the current database
+    
+    A catalog file has its own score indexes; a dict gets a ScoreIndex,
+    rebuilt when the dict changes.
+    """
+    global _score_index
+    if isinstance(NUTRITIONAL_DATABASE, NutritionCatalog):
+        return NUTRITIONAL_DATABASE
+    if _score_index is None or not _score_index.is_current(NUTRITIONAL_DATABASE):
+        _score_index = ScoreIndex(NUTRITIONAL_DATABASE)
+    return _score_index
+
 def get_items_by_score_range(min_score, max_score):
     """Get all items within a specific nutrition score range"""
-    return {
-        item: data for item, data in NUTRITIONAL_DATABASE.items()
-        if min_score <= data['score'] <= max_score
-    }
+    return _score_queries().items_by_score_range(min_score, max_score)
 
 def get_healthiest_items(limit=10):
     """Get the healthiest items from the database"""
-    sorted_items = sorted(
-        NUTRITIONAL_DATABASE.items(),
-        key=lambda x: x[1]['score'],
-        reverse=True
-    )
-    return dict(sorted_items[:limit])
+    return _score_queries().highest_scoring(limit)
 
 def get_least_healthy_items(limit=10):
     """Get the least healthy items from the database"""
-    sorted_items = sorted(
-        NUTRITIONAL_DATABASE.items(),
-        key=lambda x: x[1]['score']
-    )
-    return dict(sorted_items[:limit])
+    return _score_queries().lowest_scoring(limit)
@@ -0,0 +1,46 @@
+"""
+Score-ordered index over an in-memory nutrition database dict.
+
+Answers the same score queries as NutritionCatalog without scanning or
+sorting the database per call: range queries bisect the sorted scores and
+top/bottom-N queries slice a presorted name list. The index notices changes
+through a VersionedDict's version; a plain dict is assumed not to change.
+"""
+from bisect import bisect_left, bisect_right
+
+class ScoreIndex:
+    def __init__(self, database):
+        self.database = database
+        # Version of the database this index was built from
+        self.version = getattr(database, 'version', None)
+        
+        # Ascending by score, ties in database order
+        ascending = sorted(
+            (info['score'], position, name) for position, (name, info) in enumerate(database.items())
+        )
+        self._scores = [score for score, _, _ in ascending]
+        self._positions = [position for _, position, _ in ascending]
+        self._names = [name for _, _, name in ascending]
+        
+        # Descending by score, ties still in database order
+        descending = sorted(ascending, key=lambda entry: (-entry[0], entry[1]))
+        self._names_descending = [name for _, _, name in descending]
+    
+    def is_current(self, database):
+        """Check whether the index still matches database"""
+        return database is self.database and getattr(database, 'version', None) == self.version
+    
+    def items_by_score_range(self, min_score, max_score):
+        """{name: info} of items scoring between min_score and max_score, in database order"""
+        low = bisect_left(self._scores, min_score)
+        high = bisect_right(self._scores, max_score)
+        selected = sorted(zip(self._positions[low:high], self._names[low:high]))
+        return {name: self.database[name] for _, name in selected}
+    
+    def highest_scoring(self, limit):
+        """{name: info} of the limit best-scoring items (ties in database order)"""
+        return {name: self.database[name] for name in self._names_descending[:limit]}
+    
+    def lowest_scoring(self, limit):
+        """{name: info} of the limit worst-scoring items (ties in database order)"""
+        return {name: self.database[name] for name in self._names[:limit]}
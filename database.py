@@ -1,61 +1,41 @@
-import sqlite3
 import pandas as pd
 from datetime import datetime
 import json
 import os
+import time
+from itertools import islice
+
+from connection_manager import ConnectionManager
+from migrations import migrate, schema_version
+
+# Column types of the DataFrame getters (date columns become datetime64)
+DATE_COLUMNS = ('date', 'receipt_date', 'created_at')
+COLUMN_DTYPES = {
+    'price': 'float64',
+    'total_amount': 'float64',
+    'category': 'category'
+}
 
 class Database:
     def __init__(self, db_path="grocery_manager.db"):
         self.db_path = db_path
+        # Long-lived WAL-mode connections shared by every method
+        self.connections = ConnectionManager(db_path)
         self.init_database()
     
     def init_database(self):
-        """Initialize the database with required tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create receipts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS receipts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TIMESTAMP,
-                total_amount REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create items table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                receipt_id INTEGER,
-                item_name TEXT,
-                price REAL,
-                category TEXT,
-                nutrition_score INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (receipt_id) REFERENCES receipts (id)
-            )
-        ''')
-        
-        # Create budget table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS budget_settings (
-                id INTEGER PRIMARY KEY,
-                monthly_budget REAL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Initialize the database, applying any pending schema migrations"""
+        with self.connections.write() as cursor:
+            migrate(cursor)
+    
+    def get_schema_version(self):
+        """Get the highest schema migration applied to the database"""
+        with self.connections.read() as conn:
+            return schema_version(conn.cursor())
     
     def save_receipt(self, date, total_amount, items):
         """Save a receipt and its items to the database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
+        with self.connections.write() as cursor:
             # Insert receipt
             cursor.execute('''
                 INSERT INTO receipts (date, total_amount)
@@ -65,44 +45,216 @@ class Database:
             receipt_id = cursor.lastrowid
             
             # Insert items
-            for item in items:
-                cursor.execute('''
+            cursor.executemany('''
+                INSERT INTO items (receipt_id, item_name, price, category, nutrition_score)
+                VALUES (?, ?, ?, ?, ?)
+            ''', self._item_rows(receipt_id, items))
+            
+            return receipt_id
+    
+    def _item_rows(self, receipt_id, items):
+        return [
+            (
+                receipt_id,
+                item['item'],
+                item['price'],
+                item.get('category', 'Other'),
+                item.get('nutrition_score', 5)
+            )
+            for item in items
+        ]
+    
+    def save_receipts(self, receipts):
+        """Save several receipts and their items in a single transaction
+        
+        Each receipt is a dict with 'date', 'total_amount' and 'items'. Receipts
+        with a 'source_hash' (and 'source_path', 'ocr_stage') are also recorded
+        in ingested_files. A receipt without items saves nothing, so batch
+        ingestion retries its file next time.
+        Returns the new receipt ids (None where no receipt was saved).
+        """
+        return self.save_receipts_bulk(receipts, batch_size=None)
+    
+    def save_receipts_bulk(self, receipts, batch_size=1000, progress=None):
+        """Save an iterable of receipts, committing one transaction per batch_size receipts
+        
+        Receipts are dicts as for save_receipts and are consumed lazily, so a
+        generator over a large backfill is never held in memory. Each batch is
+        atomic: a failure rolls back that batch only, earlier batches stay
+        saved. batch_size=None saves everything in one transaction.
+        
+        progress, if given, is called after every committed batch with a dict
+        of 'receipts', 'items', 'batches', 'seconds' and 'rows_per_second'
+        (receipt and item rows written per second so far).
+        Returns the new receipt ids (None where no receipt was saved).
+        """
+        if batch_size is not None and batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1 or None, got {batch_size}")
+        
+        receipts = iter(receipts)
+        stats = {'receipts': 0, 'items': 0, 'batches': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+        start = time.perf_counter()
+        
+        receipt_ids = []
+        while True:
+            batch = list(islice(receipts, batch_size))
+            if not batch:
+                break
+            
+            with self.connections.write() as cursor:
+                item_rows = []
+                ingested_rows = []
+                now = datetime.now()
+                for receipt in batch:
+                    receipt_id = None
+                    items = receipt.get('items') or []
+                    
+                    if items:
+                        # One execute per receipt for its id; items go in a single executemany
+                        cursor.execute('''
+                            INSERT INTO receipts (date, total_amount)
+                            VALUES (?, ?)
+                        ''', (receipt['date'], receipt['total_amount']))
+                        
+                        receipt_id = cursor.lastrowid
+                        item_rows.extend(self._item_rows(receipt_id, items))
+                        stats['receipts'] += 1
+                    
+                    if receipt_id is not None and receipt.get('source_hash'):
+                        ingested_rows.append((
+                            receipt['source_hash'],
+                            receipt.get('source_path'),
+                            receipt_id,
+                            len(items),
+                            receipt.get('ocr_stage'),
+                            now
+                        ))
+                    
+                    receipt_ids.append(receipt_id)
+                
+                cursor.executemany('''
                     INSERT INTO items (receipt_id, item_name, price, category, nutrition_score)
                     VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    receipt_id,
-                    item['item'],
-                    item['price'],
-                    item.get('category', 'Other'),
-                    item.get('nutrition_score', 5)
-                ))
+                ''', item_rows)
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO ingested_files (content_hash, path, receipt_id, item_count, ocr_stage, ingested_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', ingested_rows)
             
-            conn.commit()
-            return receipt_id
+            stats['items'] += len(item_rows)
+            stats['batches'] += 1
+            stats['seconds'] = time.perf_counter() - start
+            if stats['seconds'] > 0:
+                stats['rows_per_second'] = (stats['receipts'] + stats['items']) / stats['seconds']
+            if progress:
+                progress(dict(stats))
+        
+        return receipt_ids
+    
+    def get_ingested_hashes(self):
+        """Get content hashes of all files already imported by batch ingestion
+        
+        Files recorded without items (by older versions) are left out so they
+        are retried.
+        """
+        with self.connections.read() as conn:
+            cursor = conn.cursor()
             
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+            cursor.execute('SELECT content_hash FROM ingested_files WHERE item_count > 0')
+            hashes = {row[0] for row in cursor.fetchall()}
+        
+        return hashes
     
-    def get_receipts(self, limit=None):
-        """Get receipts from the database"""
-        conn = sqlite3.connect(self.db_path)
+    def get_category_labels(self):
+        """Get each distinct item name and category with how often it was saved"""
+        query = '''
+            SELECT item_name, category, COUNT(*) as count
+            FROM items
+            WHERE item_name IS NOT NULL AND category IS NOT NULL
+            GROUP BY LOWER(item_name), category
+        '''
         
-        query = "SELECT * FROM receipts ORDER BY date DESC"
-        if limit:
-            query += f" LIMIT {limit}"
+        return self._records(self._read_frame(query, dtypes=False))
+    
+    def get_labeled_item_count(self):
+        """Get the number of saved items with a category other than 'Other'"""
+        with self.connections.read() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT COUNT(*) FROM items WHERE category IS NOT NULL AND category != 'Other'")
+            result = cursor.fetchone()
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        return result[0]
+    
+    def save_custom_mappings(self, mappings):
+        """Save or update item-to-category overrides
         
+        mappings is a list of (normalized_name, item_name, category) tuples.
+        """
+        with self.connections.write() as cursor:
+            now = datetime.now()
+            for normalized_name, item_name, category in mappings:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO custom_mappings (normalized_name, item_name, category, updated_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (normalized_name, item_name, category, now))
+    
+    def delete_custom_mapping(self, normalized_name):
+        """Remove an item-to-category override"""
+        with self.connections.write() as cursor:
+            cursor.execute('DELETE FROM custom_mappings WHERE normalized_name = ?', (normalized_name,))
+    
+    def get_custom_mappings(self):
+        """Get all item-to-category overrides as a {normalized_name: category} dict"""
+        with self.connections.read() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT normalized_name, category FROM custom_mappings')
+            mappings = dict(cursor.fetchall())
+        
+        return mappings
+    
+    def get_custom_mappings_version(self):
+        """Get a value that changes whenever the custom mappings change"""
+        with self.connections.read() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT COUNT(*), MAX(updated_at) FROM custom_mappings')
+            result = cursor.fetchone()
+        
+        return result
+    
+    def _read_frame(self, query, params=(), dtypes=True):
+        """Run a query into a DataFrame, optionally converting columns to COLUMN_DTYPES"""
+        with self.connections.read() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        
+        if dtypes:
+            for column in df.columns:
+                if column in DATE_COLUMNS:
+                    # Stored as ISO strings, with or without a time part
+                    df[column] = pd.to_datetime(df[column], format='ISO8601', errors='coerce')
+                elif column in COLUMN_DTYPES:
+                    df[column] = df[column].astype(COLUMN_DTYPES[column])
+        return df
+    
+    def _records(self, df):
         return df.to_dict('records') if not df.empty else []
     
-    def get_all_items(self):
-        """Get all items from the database"""
-        conn = sqlite3.connect(self.db_path)
+    def get_receipts_df(self, limit=None, dtypes=True):
+        """Get receipts as a DataFrame, newest first"""
+        query = "SELECT * FROM receipts ORDER BY date DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
         
+        return self._read_frame(query, dtypes=dtypes)
+    
+    def get_receipts(self, limit=None):
+        """Get receipts from the database"""
+        return self._records(self.get_receipts_df(limit, dtypes=False))
+    
+    def get_all_items_df(self, dtypes=True):
+        """Get all items with their receipt date as a DataFrame, newest first"""
         query = '''
             SELECT i.*, r.date as receipt_date
             FROM items i
@@ -110,15 +262,56 @@ class Database:
             ORDER BY r.date DESC
         '''
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        return self._read_frame(query, dtypes=dtypes)
+    
+    def get_all_items(self):
+        """Get all items from the database"""
+        return self._records(self.get_all_items_df(dtypes=False))
+    
+    def get_items_page_df(self, before_id=None, limit=10000, dtypes=True):
+        """Get one page of items with their receipt date as a DataFrame, newest (highest id) first
         
-        return df.to_dict('records') if not df.empty else []
+        Keyset pagination: pass the smallest id of the previous page as
+        before_id to get the next one. Each page is an index range on the
+        items primary key, so late pages cost the same as the first.
+        """
+        where = "WHERE i.id < ?" if before_id is not None else ""
+        params = (before_id, limit) if before_id is not None else (limit,)
+        query = f'''
+            SELECT i.*, r.date as receipt_date
+            FROM items i
+            JOIN receipts r ON i.receipt_id = r.id
+            {where}
+            ORDER BY i.id DESC
+            LIMIT ?
+        '''
+        
+        return self._read_frame(query, params, dtypes=dtypes)
     
-    def get_items_by_date_range(self, start_date, end_date):
-        """Get items within a specific date range"""
-        conn = sqlite3.connect(self.db_path)
+    def iter_items_df(self, chunk_size=10000, dtypes=True):
+        """Yield every item as DataFrames of at most chunk_size rows, newest first
         
+        Only one chunk is in memory at a time and no connection is held
+        between chunks, so consumers can aggregate years of history in
+        bounded memory (see ItemStats).
+        """
+        before_id = None
+        while True:
+            df = self.get_items_page_df(before_id, chunk_size, dtypes=dtypes)
+            if df.empty:
+                return
+            yield df
+            if len(df) < chunk_size:
+                return
+            before_id = int(df['id'].iloc[-1])
+    
+    def iter_items(self, chunk_size=10000):
+        """Yield every item as lists of at most chunk_size dicts, newest first"""
+        for df in self.iter_items_df(chunk_size, dtypes=False):
+            yield self._records(df)
+    
+    def get_items_by_date_range_df(self, start_date, end_date, dtypes=True):
+        """Get items within a specific date range as a DataFrame"""
         query = '''
             SELECT i.*, r.date as receipt_date
             FROM items i
@@ -127,15 +320,14 @@ class Database:
             ORDER BY r.date DESC
         '''
         
-        df = pd.read_sql_query(query, conn, params=(start_date, end_date))
-        conn.close()
-        
-        return df.to_dict('records') if not df.empty else []
+        return self._read_frame(query, (start_date, end_date), dtypes=dtypes)
     
-    def get_spending_by_category(self, start_date=None, end_date=None):
-        """Get spending breakdown by category"""
-        conn = sqlite3.connect(self.db_path)
-        
+    def get_items_by_date_range(self, start_date, end_date):
+        """Get items within a specific date range"""
+        return self._records(self.get_items_by_date_range_df(start_date, end_date, dtypes=False))
+    
+    def get_spending_by_category_df(self, start_date=None, end_date=None, dtypes=True):
+        """Get spending breakdown by category as a DataFrame, largest first"""
         if start_date and end_date:
             query = '''
                 SELECT i.category, SUM(i.price) as total_amount
@@ -145,50 +337,44 @@ class Database:
                 GROUP BY i.category
                 ORDER BY total_amount DESC
             '''
-            df = pd.read_sql_query(query, conn, params=(start_date, end_date))
-        else:
-            query = '''
-                SELECT category, SUM(price) as total_amount
-                FROM items
-                GROUP BY category
-                ORDER BY total_amount DESC
-            '''
-            df = pd.read_sql_query(query, conn)
+            return self._read_frame(query, (start_date, end_date), dtypes=dtypes)
         
-        conn.close()
-        return df.to_dict('records') if not df.empty else []
+        query = '''
+            SELECT category, SUM(price) as total_amount
+            FROM items
+            GROUP BY category
+            ORDER BY total_amount DESC
+        '''
+        return self._read_frame(query, dtypes=dtypes)
+    
+    def get_spending_by_category(self, start_date=None, end_date=None):
+        """Get spending breakdown by category"""
+        return self._records(self.get_spending_by_category_df(start_date, end_date, dtypes=False))
     
     def save_budget_setting(self, monthly_budget):
         """Save or update monthly budget setting"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO budget_settings (id, monthly_budget, updated_at)
-            VALUES (1, ?, ?)
-        ''', (monthly_budget, datetime.now()))
-        
-        conn.commit()
-        conn.close()
+        with self.connections.write() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO budget_settings (id, monthly_budget, updated_at)
+                VALUES (1, ?, ?)
+            ''', (monthly_budget, datetime.now()))
     
     def get_budget_setting(self):
         """Get current monthly budget setting"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT monthly_budget FROM budget_settings WHERE id = 1')
-        result = cursor.fetchone()
+        with self.connections.read() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT monthly_budget FROM budget_settings WHERE id = 1')
+            result = cursor.fetchone()
         
-        conn.close()
         return result[0] if result else 500.0  # Default budget
     
     def get_total_spending(self):
         """Get total spending across all receipts"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT SUM(total_amount) FROM receipts')
-        result = cursor.fetchone()
+        with self.connections.read() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT SUM(total_amount) FROM receipts')
+            result = cursor.fetchone()
         
-        conn.close()
         return result[0] if result[0] else 0.0
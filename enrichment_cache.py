@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+
+class EnrichmentCache:
+    """Bounded LRU cache of per-item enrichment results, shared by components
+    
+    Entries are keyed by the lower-cased item name and hold one value per
+    field ('category', 'suggestions', 'nutrition_score'). Each value is stored
+    with the version of the data it was computed from; a lookup with a
+    different version treats it as stale, so changing the lexicon, custom
+    mappings or nutrition database invalidates exactly the affected fields.
+    """
+    
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def lookup(self, key, field, version):
+        """Return (True, value) for a current cached value, else (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and field in entry:
+                value, stored_version = entry[field]
+                if stored_version == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                # Computed from data that has changed since
+                del entry[field]
+                self.invalidations += 1
+            self.misses += 1
+            return False, None
+    
+    def store(self, key, field, version, value):
+        """Cache a value, evicting the least recently used items when full"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {}
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._entries.move_to_end(key)
+            entry[field] = (value, version)
+    
+    def get(self, key, field, version, compute):
+        """Cached value of a field, calling compute() on a miss"""
+        found, value = self.lookup(key, field, version)
+        if not found:
+            value = compute()
+            self.store(key, field, version, value)
+        return value
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self):
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,193 @@
+import time
+import numpy as np
+from PIL import Image
+
+class ImagePreprocessor:
+    def __init__(self, target_dpi=300, receipt_width_inches=3.15, block_size=31,
+                 threshold_percent=12, max_skew_degrees=10, skew_step_degrees=0.5,
+                 min_metadata_dpi=96, band_rows=256):
+        # Text resolution tesseract is tuned for; larger images are downsampled to it
+        self.target_dpi = target_dpi
+        # Standard 80mm receipt paper, used to estimate DPI when the file has none
+        self.receipt_width_inches = receipt_width_inches
+        # File DPI at or below this is a placeholder (phone JPEGs say 72), not a scan resolution
+        self.min_metadata_dpi = min_metadata_dpi
+        
+        # Adaptive threshold: a pixel is ink when it is threshold_percent darker
+        # than the mean of the block_size x block_size window around it
+        self.block_size = block_size
+        self.threshold_percent = threshold_percent
+        # Rows binarized at a time, which bounds the threshold's temporary memory
+        self.band_rows = band_rows
+        
+        self.max_skew_degrees = max_skew_degrees
+        self.skew_step_degrees = skew_step_degrees
+        
+        # Per-stage timings in milliseconds for the last image, plus running totals
+        self.last_timings = {}
+        self.total_timings = {}
+        self.runs = 0
+    
+    def settings(self):
+        """Parameters that change the output image, e.g. for cache keys"""
+        return {
+            'target_dpi': self.target_dpi,
+            'receipt_width_inches': self.receipt_width_inches,
+            'min_metadata_dpi': self.min_metadata_dpi,
+            'block_size': self.block_size,
+            'threshold_percent': self.threshold_percent,
+            'max_skew_degrees': self.max_skew_degrees,
+            'skew_step_degrees': self.skew_step_degrees
+        }
+    
+    def process(self, image):
+        """Run the full preprocessing pipeline on a PIL image
+        
+        Returns a binarized, deskewed grayscale PIL image at roughly target_dpi.
+        Per-stage timings are available in last_timings afterwards.
+        """
+        timings = {}
+        start = time.perf_counter()
+        
+        # Grayscale
+        if image.mode != 'L':
+            image = image.convert('L')
+        start = self._record(timings, 'grayscale', start)
+        
+        # Resolution normalization
+        image = self.normalize_resolution(image)
+        start = self._record(timings, 'downsample', start)
+        
+        # Skew estimation and correction
+        pixels = np.array(image, dtype=np.uint8)
+        angle = self.estimate_skew(pixels)
+        if angle:
+            image = image.rotate(-angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+            pixels = np.array(image, dtype=np.uint8)
+        start = self._record(timings, 'deskew', start)
+        
+        # Binarization, written back into the same uint8 buffer
+        self.adaptive_threshold(pixels)
+        start = self._record(timings, 'threshold', start)
+        
+        result = Image.fromarray(pixels)
+        self._record(timings, 'to_image', start)
+        
+        timings['total'] = sum(timings.values())
+        timings['skew_degrees'] = angle
+        self.last_timings = timings
+        self.runs += 1
+        for stage, ms in timings.items():
+            if stage != 'skew_degrees':
+                self.total_timings[stage] = self.total_timings.get(stage, 0.0) + ms
+        
+        return result
+    
+    def _record(self, timings, stage, start):
+        """Store the elapsed time for a stage and return the new start time"""
+        now = time.perf_counter()
+        timings[stage] = (now - start) * 1000
+        return now
+    
+    def normalize_resolution(self, image):
+        """Downsample an image so its text is at about target_dpi"""
+        dpi = image.info.get('dpi')
+        if dpi and dpi[0] and dpi[0] > self.min_metadata_dpi:
+            source_dpi = float(dpi[0])
+        else:
+            # Assume the photo spans the width of the receipt
+            source_dpi = image.width / self.receipt_width_inches
+        
+        scale = self.target_dpi / source_dpi
+        if scale >= 1:
+            return image
+        
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        # reducing_gap does a fast integer box reduction before the final resample
+        return image.resize(size, resample=Image.BILINEAR, reducing_gap=2.0)
+    
+    def estimate_skew(self, pixels):
+        """Estimate counterclockwise text skew in degrees from horizontal projection profiles
+        
+        Ink pixel coordinates are projected onto rows at each candidate angle;
+        the angle whose row histogram has the highest variance has the text
+        lines best aligned. Runs on a downscaled copy.
+        """
+        if not self.max_skew_degrees:
+            return 0.0
+        
+        # Work on at most ~600px on the long side
+        step = max(1, max(pixels.shape) // 600)
+        sample = pixels[::step, ::step]
+        
+        ink = sample < (sample.mean() * 0.75)
+        ys, xs = np.nonzero(ink)
+        if len(ys) < 50:
+            return 0.0
+        ys = ys.astype(np.float32)
+        xs = xs.astype(np.float32) - sample.shape[1] / 2
+        
+        angles = np.arange(-self.max_skew_degrees, self.max_skew_degrees + 1e-9, self.skew_step_degrees)
+        best_angle = 0.0
+        best_score = -1.0
+        offset = sample.shape[1]
+        for angle in angles:
+            theta = np.deg2rad(angle)
+            rows = (ys * np.cos(theta) + xs * np.sin(theta)).astype(np.int32) + offset
+            profile = np.bincount(rows)
+            score = float(profile.var())
+            if score > best_score:
+                best_score = score
+                best_angle = float(angle)
+        
+        return best_angle
+    
+    def adaptive_threshold(self, pixels):
+        """Bradley adaptive threshold, in place on a 2D uint8 array (ink = 0, paper = 255)
+        
+        Works through band_rows rows at a time with int32 running sums, so
+        temporaries stay a few MB whatever the image size.
+        """
+        height, width = pixels.shape
+        half = self.block_size // 2
+        factor = 100 - self.threshold_percent
+        
+        # Horizontal window bounds for every column, clipped at the edges
+        x0 = np.clip(np.arange(width) - half, 0, width)
+        x1 = np.clip(np.arange(width) + half + 1, 0, width)
+        widths = (x1 - x0).astype(np.int32)
+        
+        # Original values of the rows just above the current band (they are
+        # already binarized in pixels by the time the band reads them)
+        carry = pixels[:0].copy()
+        for top in range(0, height, self.band_rows):
+            bottom = min(top + self.band_rows, height)
+            slab_top = max(0, top - half)
+            slab_bottom = min(height, bottom + half)
+            slab = np.concatenate([carry[len(carry) - (top - slab_top):], pixels[top:slab_bottom]])
+            
+            # Vertical running sums over the slab, with a zero first row
+            vertical = np.zeros((len(slab) + 1, width), dtype=np.int32)
+            np.cumsum(slab, axis=0, dtype=np.int32, out=vertical[1:])
+            rows = np.arange(top, bottom)
+            y0 = np.clip(rows - half, 0, height) - slab_top
+            y1 = np.clip(rows + half + 1, 0, height) - slab_top
+            column_sums = vertical[y1] - vertical[y0]
+            del vertical
+            
+            # Horizontal running sums of the column sums, with a zero first column
+            horizontal = np.zeros((bottom - top, width + 1), dtype=np.int32)
+            np.cumsum(column_sums, axis=1, out=horizontal[:, 1:])
+            del column_sums
+            window_sum = horizontal[:, x1] - horizontal[:, x0]
+            del horizontal
+            area = (y1 - y0).astype(np.int32)[:, None] * widths
+            
+            band = pixels[top:bottom]
+            carry = np.concatenate([carry, band])
+            carry = carry[max(0, len(carry) - half):]
+            # pixel < mean * (100 - t) / 100, without dividing
+            ink = band * area * 100 < window_sum * factor
+            band.fill(255)
+            band[ink] = 0
+        return pixels
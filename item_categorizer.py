@@ -1,10 +1,43 @@
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-import numpy as np
+import time
+
+from keyword_matcher import KeywordMatcher
+from trigram_index import SpellingCorrector
+from unique_names import apply_to_unique_names
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+FRESH_PATTERN = re.compile(r'\b(organic|fresh|raw)\b')
+MEAT_CUT_PATTERN = re.compile(r'\b(ground|lean|boneless)\b')
+MILK_PATTERN = re.compile(r'\b(whole|skim|2%|1%)\s*milk\b')
+BREAD_PATTERN = re.compile(r'\b(wheat|white|grain)\s*bread\b')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def normalize_item_name(item_name):
+    """Key for custom mappings: lower-cased with whitespace collapsed"""
+    return WHITESPACE_PATTERN.sub(' ', item_name.lower()).strip()
 
 class ItemCategorizer:
-    def __init__(self):
+    def __init__(self, model=None, database=None, cache=None, reload_interval=1.0):
+        # Optional learned CategoryModel, consulted when no rule matches
+        self.model = model
+        
+        # Optional shared EnrichmentCache; _version changes whenever the
+        # lexicon or custom mappings do, which invalidates cached results
+        self.cache = cache
+        self._version = 0
+        
+        # User corrections, by normalized name, consulted before any rule.
+        # Persisted in the database's custom_mappings table when one is given
+        self.database = database
+        self.custom_mappings = {}
+        self._custom_mappings_version = None
+        # Seconds between checks for corrections saved by other sessions or
+        # processes while categorizing single items
+        self.reload_interval = reload_interval
+        self._custom_mappings_checked = None
+        if database is not None:
+            self.reload_custom_mappings()
+        
         self.categories = {
             'Fruits': [
                 'apple', 'banana', 'orange', 'grape', 'strawberry', 'blueberry', 'raspberry',
@@ -56,70 +89,262 @@ class ItemCategorizer:
         for category, keywords in self.categories.items():
             for keyword in keywords:
                 self.keyword_to_category[keyword.lower()] = category
+        
+        self.build_matchers()
+    
+    def build_matchers(self):
+        """Compile the keyword lexicon into matchers (call again after changing categories)"""
+        # Direct matching: the first keyword of keyword_to_category found in the name wins
+        self._keyword_list = list(self.keyword_to_category)
+        self._keyword_categories = [self.keyword_to_category[k] for k in self._keyword_list]
+        self._keyword_matcher = KeywordMatcher(self._keyword_list)
+        # Misspelled names: each unknown word is corrected to the keyword word
+        # with the most similar trigrams
+        self._speller = SpellingCorrector(word for k in self._keyword_list for word in WORD_PATTERN.findall(k))
+        
+        self._category_rank = {category: rank for rank, category in enumerate(self.categories)}
+        
+        # Fuzzy matching: a word of the name (3+ chars) that is part of a keyword.
+        # Map every such fragment to the category of the first keyword, in
+        # category order, that contains it.
+        self._fragment_categories = {}
+        for category, keywords in self.categories.items():
+            for keyword in keywords:
+                if len(keyword) <= 2:
+                    continue
+                for start in range(len(keyword)):
+                    for end in range(start + 3, len(keyword) + 1):
+                        fragment = keyword[start:end]
+                        if ' ' in fragment:
+                            break
+                        self._fragment_categories.setdefault(fragment, category)
+        
+        # Category of each keyword occurrence, for suggestions
+        self._suggestion_keywords = [
+            (category, keyword)
+            for category, keywords in self.categories.items()
+            for keyword in keywords
+        ]
+        self._suggestion_matcher = KeywordMatcher(k for _, k in self._suggestion_keywords)
+        self._version += 1
+    
+    def cache_version(self):
+        """Version of everything categorization results depend on"""
+        return (self._version, self.model.version if self.model is not None else None)
     
     def categorize_item(self, item_name):
         """Categorize a grocery item based on its name"""
         if not item_name:
             return 'Other'
         
-        item_lower = item_name.lower()
+        # Pick up corrections saved by other sessions or processes
+        if self.database is not None and (
+            self._custom_mappings_checked is None
+            or time.monotonic() - self._custom_mappings_checked >= self.reload_interval
+        ):
+            self.reload_custom_mappings()
         
-        # Direct keyword matching
-        for keyword, category in self.keyword_to_category.items():
-            if keyword in item_lower:
+        if self.cache is not None:
+            return self.cache.get(item_name.lower(), 'category', self.cache_version(),
+                                  lambda: self._categorize(item_name))
+        return self._categorize(item_name)
+    
+    def _categorize(self, item_name):
+        """Custom mapping, then keyword rules, then the learned model"""
+        if self.custom_mappings:
+            category = self.custom_mappings.get(normalize_item_name(item_name))
+            if category is not None:
                 return category
         
-        # Fuzzy matching for partial words
-        for category, keywords in self.categories.items():
-            for keyword in keywords:
-                # Check if keyword is part of any word in the item name
-                item_words = re.findall(r'\b\w+\b', item_lower)
-                for word in item_words:
-                    if keyword in word or word in keyword:
-                        if len(word) > 2 and len(keyword) > 2:  # Avoid very short matches
-                            return category
+        category = self._categorize_by_rules(item_name.lower())
+        if category == 'Other' and self.model is not None:
+            category = self.model.predict(item_name) or 'Other'
+        return category
+    
+    def _categorize_by_rules(self, item_lower):
+        """Keyword and pattern rules for a lower-cased item name"""
+        
+        # Direct keyword matching, one pass over the name
+        match = self._keyword_matcher.first(item_lower)
+        if match is not None:
+            return self._keyword_categories[match]
+        
+        # Fuzzy matching for partial words: a word of the item name that is
+        # part of a keyword (no keyword is inside a word here, or the direct
+        # match would have found it)
+        best_category = None
+        best_rank = None
+        for word in WORD_PATTERN.findall(item_lower):
+            if len(word) > 2:  # Avoid very short matches
+                category = self._fragment_categories.get(word)
+                if category is not None:
+                    rank = self._category_rank[category]
+                    if best_rank is None or rank < best_rank:
+                        best_category, best_rank = category, rank
+        if best_category is not None:
+            return best_category
         
         # Special rules for common patterns
-        if re.search(r'\b(organic|fresh|raw)\b', item_lower):
+        if FRESH_PATTERN.search(item_lower):
             if any(veg in item_lower for veg in ['salad', 'greens', 'mix']):
                 return 'Vegetables'
             if any(fruit in item_lower for fruit in ['apple', 'berry', 'fruit']):
                 return 'Fruits'
         
-        if re.search(r'\b(ground|lean|boneless)\b', item_lower):
+        if MEAT_CUT_PATTERN.search(item_lower):
             return 'Meat'
         
-        if re.search(r'\b(whole|skim|2%|1%)\s*milk\b', item_lower):
+        if MILK_PATTERN.search(item_lower):
             return 'Dairy'
         
-        if re.search(r'\b(wheat|white|grain)\s*bread\b', item_lower):
+        if BREAD_PATTERN.search(item_lower):
             return 'Bakery'
         
+        # Direct keyword matching again with OCR misreadings like "brocoli"
+        # corrected word by word
+        corrected = self._speller.correct(item_lower)
+        if corrected != item_lower:
+            match = self._keyword_matcher.first(corrected)
+            if match is not None:
+                return self._keyword_categories[match]
+        
         return 'Other'
     
     def get_category_suggestions(self, item_name):
         """Get possible category suggestions for an item"""
-        suggestions = []
+        if self.cache is not None:
+            return list(self.cache.get(item_name.lower(), 'suggestions', self.cache_version(),
+                                       lambda: tuple(self._suggest(item_name))))
+        return self._suggest(item_name)
+    
+    def _suggest(self, item_name):
+        """Top 3 categories by total length of the keywords found in the name"""
         item_lower = item_name.lower()
         
-        # Score each category
+        # Score each category from the keywords found in one pass
         category_scores = {}
-        for category, keywords in self.categories.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in item_lower:
-                    score += len(keyword)  # Longer matches get higher scores
-            if score > 0:
-                category_scores[category] = score
+        for index in sorted(self._suggestion_matcher.find_all(item_lower)):
+            category, keyword = self._suggestion_keywords[index]
+            # Longer matches get higher scores
+            category_scores[category] = category_scores.get(category, 0) + len(keyword)
         
         # Return top 3 categories by score
         sorted_categories = sorted(category_scores.items(), key=lambda x: x[1], reverse=True)
         return [cat for cat, score in sorted_categories[:3]]
     
+    def categorize_many(self, names):
+        """Categorize a list, NumPy array or pandas Series of item names
+        
+        Each distinct lower-cased name is categorized once and the results are
+        broadcast back. Custom mappings saved by other processes are picked up
+        first. Names no rule matches go to the learned model, if any, in a
+        single batch. Returns the same kind of container as given (a Series
+        keeps its index).
+        """
+        if self.database is not None:
+            self.reload_custom_mappings()
+        return apply_to_unique_names(names, self._categorize_unique, 'Other')
+    
+    def _categorize_unique(self, names):
+        """Categorize distinct lower-cased names, computing only the cache misses"""
+        if self.cache is None:
+            return self._categorize_batch(names)
+        
+        version = self.cache_version()
+        categories = [None] * len(names)
+        missing = []
+        for index, name in enumerate(names):
+            found, category = self.cache.lookup(name, 'category', version) if name else (True, 'Other')
+            if found:
+                categories[index] = category
+            else:
+                missing.append(index)
+        
+        if missing:
+            computed = self._categorize_batch([names[index] for index in missing])
+            for index, category in zip(missing, computed):
+                categories[index] = category
+                self.cache.store(names[index], 'category', version, category)
+        return categories
+    
+    def _categorize_batch(self, names):
+        """Categorize lower-cased names, batching the model fallback"""
+        categories = []
+        mapped = set()
+        for index, name in enumerate(names):
+            category = self.custom_mappings.get(normalize_item_name(name)) if self.custom_mappings and name else None
+            if category is not None:
+                mapped.add(index)
+            elif name:
+                category = self._categorize_by_rules(name)
+            else:
+                category = 'Other'
+            categories.append(category)
+        
+        if self.model is not None:
+            unmatched = [
+                index for index, category in enumerate(categories)
+                if category == 'Other' and names[index] and index not in mapped
+            ]
+            if unmatched:
+                predictions = self.model.predict_many([names[index] for index in unmatched])
+                for index, prediction in zip(unmatched, predictions):
+                    if prediction:
+                        categories[index] = prediction
+        return categories
+    
+    def get_category_suggestions_many(self, names):
+        """Batch form of get_category_suggestions (missing names get no suggestions)"""
+        return apply_to_unique_names(
+            names, lambda uniques: [self.get_category_suggestions(name) for name in uniques], []
+        )
+    
     def add_custom_mapping(self, item_name, category):
         """Add a custom item-to-category mapping"""
-        # This could be extended to save custom mappings to a file or database
-        pass
+        self.add_custom_mappings([(item_name, category)])
+    
+    def add_custom_mappings(self, mappings):
+        """Add several (item_name, category) mappings, saved in one transaction"""
+        valid_categories = self.get_all_categories()
+        rows = []
+        for item_name, category in mappings:
+            if category not in valid_categories:
+                raise Exception(f"Unknown category: {category}")
+            normalized = normalize_item_name(item_name)
+            if normalized:
+                rows.append((normalized, item_name, category))
+        
+        if self.database is not None and rows:
+            self.database.save_custom_mappings(rows)
+            # Other processes may have written too; the next reload picks them up
+            self._custom_mappings_version = None
+        for normalized, _, category in rows:
+            self.custom_mappings[normalized] = category
+        self._version += 1
+    
+    def remove_custom_mapping(self, item_name):
+        """Remove a custom mapping so the item is categorized by the rules again"""
+        normalized = normalize_item_name(item_name)
+        if self.database is not None:
+            self.database.delete_custom_mapping(normalized)
+            self._custom_mappings_version = None
+        self.custom_mappings.pop(normalized, None)
+        self._version += 1
+    
+    def reload_custom_mappings(self):
+        """Reload custom mappings from the database if they changed since the last load
+        
+        Cached results are only invalidated when the mappings differ from the
+        ones in use, so reloading after this instance's own save keeps them.
+        """
+        self._custom_mappings_checked = time.monotonic()
+        version = self.database.get_custom_mappings_version()
+        if version != self._custom_mappings_version:
+            mappings = self.database.get_custom_mappings()
+            self._custom_mappings_version = version
+            if mappings != self.custom_mappings:
+                self.custom_mappings = mappings
+                self._version += 1
     
     def get_all_categories(self):
         """Get list of all available categories"""
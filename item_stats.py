@@ -0,0 +1,85 @@
+import pandas as pd
+
+class ItemStats:
+    """Running totals over item history, fed one DataFrame chunk at a time
+    
+    Holds only counters, per-category sums, the set of distinct item names
+    and the most recent items, so the whole history never has to be loaded
+    at once. Use with Database.iter_items_df().
+    """
+    
+    def __init__(self, recent_limit=20):
+        self.recent_limit = recent_limit
+        
+        self.count = 0
+        self.total_price = 0.0
+        self.score_sum = 0.0
+        self.score_count = 0
+        self.healthy = 0
+        self.unhealthy = 0
+        self.names = set()
+        # Per category: items, price sum, nutrition score sum and count
+        self.categories = pd.DataFrame(columns=['count', 'price', 'score_sum', 'score_count'], dtype='float64')
+        self.recent = None
+    
+    @classmethod
+    def from_chunks(cls, chunks, recent_limit=20):
+        """Stats over an iterable of item DataFrames"""
+        stats = cls(recent_limit)
+        for df in chunks:
+            stats.add(df)
+        return stats
+    
+    @classmethod
+    def from_frame(cls, items_df, recent_limit=20):
+        """Stats over a single item DataFrame"""
+        return cls.from_chunks([items_df], recent_limit)
+    
+    def add(self, df):
+        """Fold a chunk of items into the totals"""
+        if df.empty:
+            return
+        
+        scores = df['nutrition_score']
+        self.count += len(df)
+        self.total_price += float(df['price'].sum())
+        self.score_sum += float(scores.sum())
+        self.score_count += int(scores.count())
+        self.healthy += int((scores >= 7).sum())
+        self.unhealthy += int((scores <= 4).sum())
+        self.names.update(df['item_name'].dropna().unique().tolist())
+        
+        by_category = pd.DataFrame({
+            'count': 1,
+            'price': df['price'],
+            'score_sum': scores,
+            'score_count': scores.notna()
+        }).groupby(df['category'], observed=True).sum().astype('float64')
+        by_category.index = by_category.index.astype(object)
+        self.categories = by_category if self.categories.empty else self.categories.add(by_category, fill_value=0)
+        
+        recent = df.nlargest(self.recent_limit, 'id')
+        if self.recent is not None:
+            recent = pd.concat([self.recent, recent]).nlargest(self.recent_limit, 'id')
+        self.recent = recent
+    
+    @property
+    def average_score(self):
+        return self.score_sum / self.score_count if self.score_count else float('nan')
+    
+    @property
+    def unique_items(self):
+        return len(self.names)
+    
+    def category_counts(self):
+        """{category: number of items}"""
+        return {category: int(count) for category, count in self.categories['count'].items()}
+    
+    def category_spending(self):
+        """DataFrame of category and total price"""
+        return self.categories['price'].rename_axis('category').reset_index()
+    
+    def category_nutrition(self):
+        """DataFrame of category and average nutrition score"""
+        nutrition = (self.categories['score_sum'] / self.categories['score_count']).rename('nutrition_score')
+        return nutrition.rename_axis('category').reset_index()
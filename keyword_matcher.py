@@ -0,0 +1,74 @@
+from collections import deque
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every keyword in a string in one pass
+    
+    Keywords are identified by their position in the list given to the
+    constructor, which doubles as their priority (lower index wins).
+    """
+    
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        
+        # Trie: goto transitions and keyword ids ending at each state
+        goto = [{}]
+        ends = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    ends.append([])
+                state = next_state
+            ends[state].append(index)
+        
+        # Failure links in breadth-first order, folded into a full transition
+        # table so matching is a single dict lookup per character
+        fail = [0] * len(goto)
+        self._delta = [dict(transitions) for transitions in goto]
+        matches = [list(found) for found in ends]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            matches[state].extend(matches[fail[state]])
+            for ch, next_state in goto[state].items():
+                fail[next_state] = self._delta[fail[state]].get(ch, 0)
+                queue.append(next_state)
+            # Inherit the failure state's transitions for characters with no goto edge
+            for ch, target in self._delta[fail[state]].items():
+                if ch not in self._delta[state]:
+                    self._delta[state][ch] = target
+        
+        # Every keyword id matched on reaching a state, and the best (lowest) one
+        self._matches = [tuple(sorted(set(found))) for found in matches]
+        self._best = [found[0] if found else None for found in self._matches]
+    
+    def first(self, text):
+        """Index of the highest-priority keyword occurring anywhere in text, or None"""
+        delta = self._delta
+        best_by_state = self._best
+        state = 0
+        best = None
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            found = best_by_state[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+    
+    def find_all(self, text):
+        """Set of indices of all keywords occurring in text"""
+        delta = self._delta
+        matches = self._matches
+        state = 0
+        found = set()
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if matches[state]:
+                found.update(matches[state])
+        return found
@@ -0,0 +1,134 @@
+"""
+Versioned schema migrations for the grocery database.
+
+Each migration is (version, description, statements). The schema_version
+table records which versions have been applied; Database.init_database runs
+the pending ones in order at startup. Migrations are only ever appended:
+never edit or renumber one that has shipped, add a new one instead.
+
+Statements use IF NOT EXISTS so databases created before this table existed
+(which already have the original tables) upgrade cleanly.
+"""
+from datetime import datetime
+
+MIGRATIONS = [
+    (1, "Initial tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS receipts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TIMESTAMP,
+            total_amount REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            receipt_id INTEGER,
+            item_name TEXT,
+            price REAL,
+            category TEXT,
+            nutrition_score INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (receipt_id) REFERENCES receipts (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS budget_settings (
+            id INTEGER PRIMARY KEY,
+            monthly_budget REAL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Batch ingestion resume ledger
+        '''
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            content_hash TEXT PRIMARY KEY,
+            path TEXT,
+            receipt_id INTEGER,
+            item_count INTEGER,
+            ocr_stage TEXT,
+            ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (receipt_id) REFERENCES receipts (id)
+        )
+        ''',
+        # User category corrections
+        '''
+        CREATE TABLE IF NOT EXISTS custom_mappings (
+            normalized_name TEXT PRIMARY KEY,
+            item_name TEXT,
+            category TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        '''
+    ]),
+    (2, "Indexes for date range, receipt join and category queries", [
+        # Date ordering and ranges (dashboards, budget month, recent receipts)
+        'CREATE INDEX IF NOT EXISTS idx_receipts_date ON receipts (date)',
+        # Joining items to their receipts
+        'CREATE INDEX IF NOT EXISTS idx_items_receipt_id ON items (receipt_id)',
+        # Category filters and grouping, covering the join column
+        'CREATE INDEX IF NOT EXISTS idx_items_category_receipt ON items (category, receipt_id)'
+    ]),
+    (3, "OCR result cache keyed by image and OCR settings", [
+        # Earlier caches were keyed by the image alone; they are only a cache,
+        # so they are dropped rather than converted
+        'DROP TABLE IF EXISTS ocr_cache',
+        '''
+        CREATE TABLE ocr_cache (
+            pixel_hash TEXT NOT NULL,
+            ocr_key TEXT NOT NULL,
+            perceptual_hash INTEGER,
+            thumbnail BLOB,
+            text TEXT,
+            items TEXT,
+            parser_version INTEGER,
+            hit_count INTEGER DEFAULT 0,
+            last_accessed TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (pixel_hash, ocr_key)
+        )
+        '''
+    ])
+]
+
+def schema_version(cursor):
+    """Highest migration version applied to the database (0 for a new database)"""
+    cursor.execute('SELECT MAX(version) FROM schema_version')
+    result = cursor.fetchone()
+    return result[0] or 0
+
+def migrate(cursor, migrations=MIGRATIONS):
+    """Apply pending migrations in order; returns the versions applied
+    
+    Runs in one immediate transaction, so concurrent processes opening the
+    same database wait for each other instead of migrating twice, and a
+    failed migration leaves the schema at the previous version. The caller
+    commits.
+    """
+    if not cursor.connection.in_transaction:
+        cursor.execute('BEGIN IMMEDIATE')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP
+        )
+    ''')
+    
+    current = schema_version(cursor)
+    applied = []
+    for version, description, statements in sorted(migrations, key=lambda migration: migration[0]):
+        if version <= current:
+            continue
+        
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute('''
+            INSERT INTO schema_version (version, description, applied_at)
+            VALUES (?, ?, ?)
+        ''', (version, description, datetime.now()))
+        applied.append(version)
+    
+    return applied
@@ -1,9 +1,59 @@
 import re
+import numpy as np
 from data.nutritional_data import NUTRITIONAL_DATABASE
+from data.nutrition_catalog import NutritionCatalog
+from trigram_index import TrigramIndex, SpellingCorrector
+from keyword_matcher import KeywordMatcher
+from unique_names import apply_to_unique_names
+
+TOKEN_PATTERN = re.compile(r'\b\w+\b')
+
+# Score tiers for items not in the database, checked in order: the first tier
+# with a pattern inside the item name decides the score
+CATEGORY_SCORE_RULES = [
+    # Healthy foods (score 8-10)
+    (9, [
+        'apple', 'banana', 'orange', 'berry', 'grape', 'kiwi', 'mango',
+        'broccoli', 'spinach', 'kale', 'carrot', 'pepper', 'tomato',
+        'quinoa', 'brown rice', 'oats', 'whole wheat', 'whole grain',
+        'salmon', 'tuna', 'chicken breast', 'turkey', 'tofu',
+        'almond', 'walnut', 'chia', 'flax'
+    ]),
+    # Moderately healthy (score 6-7)
+    (6, [
+        'milk', 'yogurt', 'cheese', 'egg', 'pasta', 'rice', 'potato',
+        'bread', 'cereal', 'legume', 'bean'
+    ]),
+    # Less healthy (score 3-5)
+    (4, [
+        'bacon', 'sausage', 'hot dog', 'pizza', 'burger',
+        'french fries', 'chip', 'cracker', 'cookie'
+    ]),
+    # Unhealthy (score 1-2)
+    (2, [
+        'soda', 'candy', 'chocolate', 'ice cream', 'donut',
+        'energy drink', 'alcohol', 'beer', 'wine'
+    ])
+]
+DEFAULT_CATEGORY_SCORE = 5
 
 class NutritionAnalyzer:
-    def __init__(self):
-        self.nutritional_db = NUTRITIONAL_DATABASE
+    def __init__(self, cache=None, nutritional_db=None):
+        # A dict or an on-disk NutritionCatalog; defaults to NUTRITIONAL_DATABASE
+        self.nutritional_db = NUTRITIONAL_DATABASE if nutritional_db is None else nutritional_db
+        # Optional shared EnrichmentCache of scores by lower-cased name
+        self.cache = cache
+        
+        # All category patterns in one automaton, in tier order, so the
+        # lowest matching pattern index is in the highest matching tier
+        self._category_pattern_scores = [score for score, patterns in CATEGORY_SCORE_RULES for _ in patterns]
+        self._category_matcher = KeywordMatcher(
+            pattern for _, patterns in CATEGORY_SCORE_RULES for pattern in patterns
+        )
+        
+        # Token and trigram indexes over the database names for fuzzy
+        # matching, built on first use and rebuilt when the database changes
+        self._index_version = None
         
         # Nutrition scoring weights
         self.scoring_weights = {
@@ -25,24 +75,146 @@ class NutritionAnalyzer:
             return 5
         
         item_lower = item_name.lower()
-        
+        if self.cache is not None:
+            return self.cache.get(item_lower, 'nutrition_score', self.cache_version(),
+                                  lambda: self._score(item_lower))
+        return self._score(item_lower)
+    
+    def score_many(self, names):
+        """Nutrition scores for a list, NumPy array or pandas Series of item names
+        
+        Each distinct lower-cased name is scored once and the integer scores
+        are broadcast back; missing names score 5. Returns the same kind of
+        container as given (a Series keeps its index).
+        """
+        return apply_to_unique_names(
+            names, lambda uniques: [self.get_nutrition_score(name) for name in uniques], 5, dtype=np.int64
+        )
+    
+    def cache_version(self):
+        """Version of the nutrition data scores depend on"""
+        return (id(self.nutritional_db), getattr(self.nutritional_db, 'version', len(self.nutritional_db)))
+    
+    def build_index(self):
+        """Tokenize every database item once and index the items by token
+        
+        Also indexes the spelling of every known word (database tokens and
+        category pattern words) for correcting OCR misreadings word by word.
+        A catalog file with its own token and word tables answers those
+        lookups itself, so only the category pattern words are indexed here.
+        """
+        if isinstance(self.nutritional_db, NutritionCatalog) and self.nutritional_db.has_word_index:
+            self._catalog = self.nutritional_db
+            self._entry_names = None
+            words = {}
+        else:
+            self._catalog = None
+            self._entry_names = list(self.nutritional_db)
+            self._entry_tokens = [frozenset(TOKEN_PATTERN.findall(name)) for name in self._entry_names]
+            self._token_index = {}
+            for position, tokens in enumerate(self._entry_tokens):
+                for token in tokens:
+                    self._token_index.setdefault(token, []).append(position)
+            words = dict.fromkeys(self._token_index)
+        
+        for _, patterns in CATEGORY_SCORE_RULES:
+            for pattern in patterns:
+                words.update(dict.fromkeys(TOKEN_PATTERN.findall(pattern)))
+        self._speller = SpellingCorrector(words, source=self._catalog)
+        self._name_index = None
+        self._index_version = self.cache_version()
+    
+    def find_similar_item(self, item_lower):
+        """First database item, in database order, similar to a lower-cased name
+        
+        Only items sharing a token with the name can be similar, so only those
+        are scored. Returns None when there is none.
+        """
+        if self._index_version != self.cache_version():
+            self.build_index()
+        
+        tokens = set(TOKEN_PATTERN.findall(item_lower))
+        if not tokens:
+            return None
+        if self._catalog is not None:
+            return self._catalog.similar_name(tokens)
+        
+        candidates = set()
+        for token in tokens:
+            candidates.update(self._token_index.get(token, ()))
+        
+        size = len(tokens)
+        for position in sorted(candidates):
+            entry_tokens = self._entry_tokens[position]
+            # Jaccard > 0.5 needs the smaller set to be over half the larger
+            if 2 * min(size, len(entry_tokens)) <= max(size, len(entry_tokens)):
+                continue
+            shared = len(tokens & entry_tokens)
+            if 2 * shared > size + len(entry_tokens) - shared:
+                return self._entry_names[position]
+        return None
+    
+    def find_nearest_items(self, item_name, k=5, cutoff=None):
+        """Database items with names spelled most like item_name, as (name, similarity) pairs
+        
+        Indexes every database name on first use, including those of a
+        catalog file.
+        """
+        if self._index_version != self.cache_version():
+            self.build_index()
+        if self._name_index is None:
+            self._name_index = TrigramIndex(self.nutritional_db if self._entry_names is None else self._entry_names)
+        return self._name_index.query(item_name, k=k, cutoff=cutoff)
+    
+    def correct_spelling(self, item_lower):
+        """item_lower with each misspelled word replaced by the closest known word
+        
+        Known words are the database tokens and category pattern words; see
+        SpellingCorrector for which words count as misspelled.
+        """
+        if self._index_version != self.cache_version():
+            self.build_index()
+        return self._speller.correct(item_lower)
+    
+    def _score(self, item_lower):
+        """Exact match, then similar database item, then category patterns
+        
+        Names none of these recognise are retried with misspelled words
+        corrected, for OCR misreadings like "bannanas".
+        """
+        score = self._match_database(item_lower)
+        if score is not None:
+            return score
+        
+        # Category-based scoring, when a pattern is in the name as read
+        if self._category_matcher.first(item_lower) is not None:
+            return self._score_by_category(item_lower)
+        
+        corrected = self.correct_spelling(item_lower)
+        if corrected != item_lower:
+            score = self._match_database(corrected)
+            if score is not None:
+                return score
+        return self._score_by_category(corrected)
+    
+    def _match_database(self, item_lower):
+        """Score of the exact or similar database item, or None"""
         # Check direct matches in nutritional database
-        if item_lower in self.nutritional_db:
-            return self.nutritional_db[item_lower]['score']
+        entry = self.nutritional_db.get(item_lower)
+        if entry is not None:
+            return entry['score']
         
         # Fuzzy matching for similar items
-        for db_item, data in self.nutritional_db.items():
-            if self._items_similar(item_lower, db_item):
-                return data['score']
-        
-        # Category-based scoring
-        return self._score_by_category(item_lower)
+        similar = self.find_similar_item(item_lower)
+        if similar is not None:
+            return self.nutritional_db[similar]['score']
+        return None
     
     def _items_similar(self, item1, item2):
         """Check if two items are similar enough for nutrition scoring"""
         # Simple similarity check - could be enhanced with fuzzy string matching
-        words1 = set(re.findall(r'\b\w+\b', item1))
-        words2 = set(re.findall(r'\b\w+\b', item2))
+        words1 = set(TOKEN_PATTERN.findall(item1))
+        words2 = set(TOKEN_PATTERN.findall(item2))
         
         # If they share significant words
         intersection = words1.intersection(words2)
@@ -56,46 +228,19 @@ class NutritionAnalyzer:
     
     def _score_by_category(self, item_name):
         """Score item based on food category patterns"""
-        # Healthy foods (score 8-10)
-        if any(pattern in item_name for pattern in [
-            'apple', 'banana', 'orange', 'berry', 'grape', 'kiwi', 'mango',
-            'broccoli', 'spinach', 'kale', 'carrot', 'pepper', 'tomato',
-            'quinoa', 'brown rice', 'oats', 'whole wheat', 'whole grain',
-            'salmon', 'tuna', 'chicken breast', 'turkey', 'tofu',
-            'almond', 'walnut', 'chia', 'flax'
-        ]):
-            return 9
-        
-        # Moderately healthy (score 6-7)
-        if any(pattern in item_name for pattern in [
-            'milk', 'yogurt', 'cheese', 'egg', 'pasta', 'rice', 'potato',
-            'bread', 'cereal', 'legume', 'bean'
-        ]):
-            return 6
-        
-        # Less healthy (score 3-5)
-        if any(pattern in item_name for pattern in [
-            'bacon', 'sausage', 'hot dog', 'pizza', 'burger',
-            'french fries', 'chip', 'cracker', 'cookie'
-        ]):
-            return 4
-        
-        # Unhealthy (score 1-2)
-        if any(pattern in item_name for pattern in [
-            'soda', 'candy', 'chocolate', 'ice cream', 'donut',
-            'energy drink', 'alcohol', 'beer', 'wine'
-        ]):
-            return 2
-        
-        # Default score for unrecognized items
-        return 5
+        match = self._category_matcher.first(item_name)
+        if match is None:
+            # Default score for unrecognized items
+            return DEFAULT_CATEGORY_SCORE
+        return self._category_pattern_scores[match]
     
     def get_nutritional_info(self, item_name):
         """Get detailed nutritional information for an item"""
         item_lower = item_name.lower()
         
-        if item_lower in self.nutritional_db:
-            return self.nutritional_db[item_lower]
+        entry = self.nutritional_db.get(item_lower)
+        if entry is not None:
+            return entry
         
         # Return basic info for unknown items
         return {
@@ -124,16 +269,32 @@ class NutritionAnalyzer:
         return analysis
     
     def get_recommendations(self, items_df):
-        """Get personalized nutrition recommendations"""
+        """Get personalized nutrition recommendations
+        
+        Only the category and nutrition_score columns are read, so a parsed
+        receipt frame works as well as stored items.
+        """
         if items_df.empty:
             return []
         
+        scores = items_df['nutrition_score']
+        return self._recommendations(
+            scores.mean(),
+            items_df['category'].value_counts().to_dict(),
+            len(items_df),
+            int((scores <= 4).sum())
+        )
+    
+    def get_recommendations_from_stats(self, stats):
+        """Get personalized nutrition recommendations from ItemStats totals"""
+        if not stats.count:
+            return []
+        return self._recommendations(stats.average_score, stats.category_counts(), stats.count, stats.unhealthy)
+    
+    def _recommendations(self, avg_score, category_counts, total_items, unhealthy):
+        """Recommendations from the average score, {category: items}, item count and unhealthy item count"""
         recommendations = []
         
-        # Analyze current patterns
-        avg_score = items_df['nutrition_score'].mean()
-        category_counts = items_df['category'].value_counts().to_dict()
-        
         # Low overall nutrition score
         if avg_score < 6:
             recommendations.append(
@@ -143,7 +304,6 @@ class NutritionAnalyzer:
         # Too many processed foods
         processed_categories = ['Snacks', 'Beverages', 'Frozen']
         processed_count = sum(category_counts.get(cat, 0) for cat in processed_categories)
-        total_items = len(items_df)
         
         if processed_count / total_items > 0.3:
             recommendations.append(
@@ -162,8 +322,7 @@ class NutritionAnalyzer:
             )
         
         # Healthy alternatives
-        unhealthy_items = items_df[items_df['nutrition_score'] <= 4]
-        if not unhealthy_items.empty:
+        if unhealthy:
             recommendations.append(
                 "💡 Consider healthier alternatives for items like chips, candy, and sugary drinks."
             )
@@ -0,0 +1,165 @@
+import hashlib
+import json
+from datetime import datetime
+
+import numpy as np
+
+ENTRY_QUERY = '''
+    SELECT pixel_hash, text, items, parser_version FROM ocr_cache
+    WHERE pixel_hash = ? AND ocr_key = ?
+'''
+
+class OCRCache:
+    def __init__(self, database, max_entries=500, max_distance=4, thumbnail_size=64, max_pixel_difference=8):
+        self.db = database
+        # Maximum number of cached receipts kept before least recently used eviction
+        self.max_entries = max_entries
+        # Largest perceptual hash Hamming distance (out of 64 bits) for a near-duplicate candidate
+        self.max_distance = max_distance
+        # Candidates are confirmed on a thumbnail_size x thumbnail_size grayscale copy:
+        # no pixel may differ by more than max_pixel_difference levels (after evening
+        # out brightness). The 9x8 dHash alone can't tell two receipts apart.
+        self.thumbnail_size = thumbnail_size
+        self.max_pixel_difference = max_pixel_difference
+        
+        # The ocr_cache table is created by the database migrations
+        self.stats = {'hits': 0, 'near_hits': 0, 'near_rejected': 0, 'misses': 0, 'evictions': 0}
+    
+    def image_keys(self, image, ocr_key=''):
+        """Get the (pixel hash, OCR key, perceptual hash, thumbnail) cache keys for an image
+        
+        ocr_key identifies the settings the text is produced with (see
+        OCRProcessor.cache_key); entries made with other settings never match.
+        """
+        # Hash the decoded pixels so re-encoded copies of the same image still match
+        digest = hashlib.sha256()
+        digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+        digest.update(image.tobytes())
+        
+        thumbnail = image.convert('L').resize((self.thumbnail_size, self.thumbnail_size)).tobytes()
+        return digest.hexdigest(), ocr_key, self._difference_hash(image), thumbnail
+    
+    def _same_picture(self, thumbnail, other):
+        """Confirm a near-duplicate candidate by comparing thumbnails pixel by pixel"""
+        if other is None or len(other) != len(thumbnail):
+            return False
+        
+        a = np.frombuffer(thumbnail, dtype=np.uint8).astype(np.int16)
+        b = np.frombuffer(other, dtype=np.uint8).astype(np.int16)
+        # Ignore a uniform brightness shift, e.g. from re-encoding
+        a -= int(round(a.mean()))
+        b -= int(round(b.mean()))
+        return int(np.abs(a - b).max()) <= self.max_pixel_difference
+    
+    def _difference_hash(self, image):
+        """64-bit dHash: compares neighbouring pixels of a 9x8 grayscale thumbnail"""
+        thumbnail = image.convert('L').resize((9, 8))
+        pixels = list(thumbnail.getdata())
+        
+        value = 0
+        for row in range(8):
+            for col in range(8):
+                left = pixels[row * 9 + col]
+                right = pixels[row * 9 + col + 1]
+                value = (value << 1) | (1 if left > right else 0)
+        
+        # SQLite integers are signed 64-bit
+        return value - (1 << 64) if value >= (1 << 63) else value
+    
+    def lookup(self, keys, parser_version=None):
+        """Get the cached entry for an image, or None on a miss
+        
+        Returns a dict with 'text' and 'items'; items are None if they were
+        never parsed, or were parsed by a parser_version other than the given
+        one. Exact pixel matches are tried first. Otherwise entries whose
+        perceptual hash is within max_distance are candidates, closest first,
+        and the first whose thumbnail matches is used.
+        """
+        pixel_hash, ocr_key, perceptual_hash, thumbnail = keys
+        with self.db.connections.write() as cursor:
+            cursor.execute(ENTRY_QUERY, (pixel_hash, ocr_key))
+            row = cursor.fetchone()
+            
+            if row:
+                self.stats['hits'] += 1
+            else:
+                # Near-duplicate search over the (bounded) set of cached hashes
+                cursor.execute('SELECT pixel_hash, perceptual_hash FROM ocr_cache WHERE ocr_key = ?', (ocr_key,))
+                candidates = []
+                for candidate_hash, candidate_phash in cursor.fetchall():
+                    distance = bin((candidate_phash ^ perceptual_hash) & ((1 << 64) - 1)).count('1')
+                    if distance <= self.max_distance:
+                        candidates.append((distance, candidate_hash))
+                
+                best_hash = None
+                for _, candidate_hash in sorted(candidates):
+                    cursor.execute('SELECT thumbnail FROM ocr_cache WHERE pixel_hash = ? AND ocr_key = ?',
+                                   (candidate_hash, ocr_key))
+                    if self._same_picture(thumbnail, cursor.fetchone()[0]):
+                        best_hash = candidate_hash
+                        break
+                    self.stats['near_rejected'] += 1
+                
+                if best_hash is None:
+                    self.stats['misses'] += 1
+                    return None
+                
+                cursor.execute(ENTRY_QUERY, (best_hash, ocr_key))
+                row = cursor.fetchone()
+                self.stats['near_hits'] += 1
+            
+            cursor.execute('''
+                UPDATE ocr_cache SET hit_count = hit_count + 1, last_accessed = ?
+                WHERE pixel_hash = ? AND ocr_key = ?
+            ''', (datetime.now(), row[0], ocr_key))
+            
+            _, text, items, items_parser_version = row
+            return {
+                'text': text,
+                'items': json.loads(items) if items is not None and items_parser_version == parser_version else None
+            }
+    
+    def store(self, keys, text, items=None, parser_version=None):
+        """Cache the OCR text (and the items parser_version parsed from it, if available) for an image"""
+        pixel_hash, ocr_key, perceptual_hash, thumbnail = keys
+        with self.db.connections.write() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO ocr_cache
+                    (pixel_hash, ocr_key, perceptual_hash, thumbnail, text, items, parser_version, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                pixel_hash,
+                ocr_key,
+                perceptual_hash,
+                thumbnail,
+                text,
+                json.dumps(items) if items is not None else None,
+                parser_version if items is not None else None,
+                datetime.now()
+            ))
+            
+            # Evict least recently used entries beyond the size bound
+            cursor.execute('''
+                DELETE FROM ocr_cache WHERE rowid IN (
+                    SELECT rowid FROM ocr_cache
+                    ORDER BY last_accessed DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+            self.stats['evictions'] += cursor.rowcount
+    
+    def clear(self):
+        """Remove all cached OCR results"""
+        with self.db.connections.write() as cursor:
+            cursor.execute('DELETE FROM ocr_cache')
+    
+    def get_stats(self):
+        """Get hit/miss counters and the current number of cached entries"""
+        with self.db.connections.read() as conn:
+            entries = conn.execute('SELECT COUNT(*) FROM ocr_cache').fetchone()[0]
+        
+        lookups = self.stats['hits'] + self.stats['near_hits'] + self.stats['misses']
+        stats = dict(self.stats)
+        stats['entries'] = entries
+        stats['hit_rate'] = (self.stats['hits'] + self.stats['near_hits']) / lookups if lookups else 0.0
+        return stats
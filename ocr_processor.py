@@ -1,16 +1,165 @@
 import pytesseract
+import hashlib
+import json
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image, ImageEnhance, ImageFilter
 import numpy as np
 
+from ocr_worker_pool import OCRWorkerPool
+from receipt_locator import ReceiptLocator
+
+# Tesseract configurations tried for every receipt, in order of preference
+OCR_CONFIGS = [
+    # Standard configuration with expanded character set
+    r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,- $@/%&\'',
+    # Alternative configuration for better line detection
+    r'--oem 3 --psm 4',
+    # Fallback configuration
+    r'--oem 3 --psm 8'
+]
+
+# Adaptive cascade: stages run in order and OCR stops at the first stage whose
+# result has at least min_confidence mean word confidence (0-100) and
+# min_price_lines lines ending in a price
+DEFAULT_OCR_CASCADE = [
+    {'name': 'psm6', 'config': OCR_CONFIGS[0], 'min_confidence': 60, 'min_price_lines': 2},
+    {'name': 'psm4', 'config': OCR_CONFIGS[1], 'min_confidence': 60, 'min_price_lines': 2},
+    {'name': 'psm8', 'config': OCR_CONFIGS[2], 'min_confidence': 0, 'min_price_lines': 0}
+]
+
+# Configuration for the single image_to_data pass used by the layout mode
+LAYOUT_CONFIG = OCR_CONFIGS[0]
+
+# A price token as it appears in a receipt's price column
+PRICE_TOKEN_PATTERN = re.compile(r'^\$?(\d{1,3}\.\d{2})$')
+# A line ending in a price, used to judge cascade results
+TRAILING_PRICE_PATTERN = re.compile(r'\d{1,3}\.\d{2}\s*$')
+
+# Version of parse_items_and_prices and its rule tables. Bump it whenever
+# they change what is parsed, so items cached by OCRCache are parsed again.
+PARSER_VERSION = 1
+
+# Receipt line parser rule tables, compiled once at import.
+# Characters allowed in an item name, and a price
+ITEM_NAME = r'[A-Za-z][A-Za-z0-9\s\-\&\'\.\,\/\%]{1,40}'
+PRICE = r'\d{1,3}\.\d{2}'
+
+# Common receipt headers/footers and non-item lines (matched against the upper-cased line)
+SKIP_RULES = [
+    r'RECEIPT', r'TOTAL', r'SUBTOTAL', r'TAX', r'CHANGE', r'CASH',
+    r'CREDIT', r'DEBIT', r'THANK YOU', r'STORE', r'DATE', r'TIME',
+    r'CASHIER', r'REG#', r'TRANS#', r'BALANCE', r'TENDER', r'VISA',
+    r'MASTERCARD', r'AMEX', r'DISCOVER', r'CARD', r'APPROVED',
+    r'WELCOME', r'SAVE', r'COUPON', r'DISCOUNT', r'MEMBER',
+    r'REWARDS', r'POINTS', r'PHONE', r'ADDRESS', r'STREET',
+    r'CITY', r'STATE', r'ZIP', r'^\d{1,2}\/\d{1,2}\/\d{2,4}$',  # dates
+    r'^\d{1,2}:\d{2}$',  # times
+    r'^[A-Z]{2,}\s+\d+$',  # store codes
+    r'^\*+$', r'^-+$', r'^=+$'  # separators
+]
+SKIP_PATTERN = re.compile('|'.join(f'(?:{rule})' for rule in SKIP_RULES))
+
+# Item and price on one line: "ITEM NAME 12.99", "ITEM NAME  12.99", "ITEM NAME $12.99",
+# or with a quantity: "2 APPLES 5.99", "1@ ITEM 3.99"
+PRICED_LINE_PATTERN = re.compile(
+    rf'^(?:(?P<name>{ITEM_NAME})\s+\$?|\d+[@\s]+(?P<quantity_name>{ITEM_NAME})\s+)(?P<price>{PRICE})$',
+    re.IGNORECASE
+)
+# Item name on its own line, with the price on the next one
+NAME_ONLY_PATTERN = re.compile(rf'^({ITEM_NAME})$', re.IGNORECASE)
+PRICE_ONLY_PATTERN = re.compile(rf'^\$?({PRICE})$')
+# Very broad pattern used when nothing else matched: any text followed by a price
+FALLBACK_LINE_PATTERN = re.compile(rf'([A-Za-z][A-Za-z0-9\s\-\&\'\.\,\/\%]+?)\s+({PRICE})\s*$')
+
+QUANTITY_PREFIX_PATTERN = re.compile(r'^\d+[@\s]+(?=[A-Za-z])')
+DIGITS_ONLY_PATTERN = re.compile(r'^\d+$')
+NO_LETTERS_PATTERN = re.compile(r'^[^A-Za-z]*$')
+
+# Item name cleanup
+WHITESPACE_PATTERN = re.compile(r'\s+')
+NAME_PREFIX_PATTERN = re.compile(r'^(ORGANIC|ORG|FRESH|PREMIUM|SELECT)\s+', re.IGNORECASE)
+ABBREVIATIONS = {
+    'LB': 'POUND',
+    'OZ': 'OUNCE',
+    'PKG': 'PACKAGE',
+    'CT': 'COUNT'
+}
+ABBREVIATION_PATTERN = re.compile(r'\b(' + '|'.join(ABBREVIATIONS) + r')\b', re.IGNORECASE)
+
 class OCRProcessor:
-    def __init__(self):
+    def __init__(self, concurrent=False, max_workers=None,
+                 early_exit_lines=8, early_exit_confidence=None, single_pass=False,
+                 cache=None, pool_size=0, preprocessor=None, locator=None,
+                 split_columns=False, tile_height=None, tile_overlap=40, tile_workers=None,
+                 cascade=None):
         # Configure tesseract if needed
         # pytesseract.pytesseract.tesseract_cmd = r'/usr/bin/tesseract'  # Adjust path as needed
-        pass
+        
+        # Concurrent mode runs all configs at once in a thread pool; tesseract
+        # runs as a subprocess so the threads don't contend for the GIL
+        self.concurrent = concurrent
+        self.max_workers = max_workers or len(OCR_CONFIGS)
+        
+        # Quality thresholds for returning before every config has finished.
+        # A result passes when it has at least early_exit_lines non-empty lines
+        # and, if early_exit_confidence is set, a mean word confidence (0-100)
+        # at or above it.
+        self.early_exit_lines = early_exit_lines
+        self.early_exit_confidence = early_exit_confidence
+        
+        # Single-pass mode runs one image_to_data pass and rebuilds lines from
+        # the word boxes instead of running every config through image_to_string
+        self.single_pass = single_pass
+        
+        # Optional OCRCache; cache hits skip tesseract entirely
+        self.cache = cache
+        
+        # With pool_size > 0, OCR runs on long-lived worker processes that keep
+        # the engine loaded instead of starting tesseract for every call
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        
+        # Optional ImagePreprocessor (NumPy pipeline) replacing the PIL filter chain
+        self.preprocessor = preprocessor
+        
+        # Optional ReceiptLocator that crops photos to the receipt paper before
+        # preprocessing. With split_columns, the item-name and price columns are
+        # OCRed separately and paired back up by row position.
+        if split_columns and locator is None:
+            locator = ReceiptLocator()
+        self.locator = locator
+        self.split_columns = split_columns
+        
+        # Images taller than 1.5 x tile_height (after preprocessing) are cut into
+        # strips at blank rows and the strips are OCRed in parallel, one
+        # tesseract run per tile worker. Where no blank row is near a cut, the
+        # strips extend tile_overlap pixels past it so no line is lost at the seam.
+        self.tile_height = tile_height
+        self.tile_overlap = tile_overlap
+        self.tile_workers = tile_workers or os.cpu_count() or 1
+        self._tile_executor = None
+        
+        # Confidence-driven cascade (a list of stages like DEFAULT_OCR_CASCADE,
+        # or True for the default). cascade_stats counts which stage each
+        # receipt was accepted at and how many tesseract passes were run.
+        self.cascade = DEFAULT_OCR_CASCADE if cascade is True else cascade
+        self.cascade_stats = {'receipts': 0, 'passes': 0, 'stages': {}}
+        self._stats_lock = threading.Lock()
+        
+        # Details of the last extraction on the current thread (see last_ocr_info)
+        self._local = threading.local()
+        
+        self._executor = None
     
     def preprocess_image(self, image):
         """Preprocess image for better OCR results"""
+        if self.preprocessor is not None:
+            return self.preprocessor.process(image)
+        
         try:
             # Convert to grayscale
             if image.mode != 'L':
@@ -33,134 +182,541 @@ class OCRProcessor:
             print(f"Error preprocessing image: {e}")
             return image
     
+    def cache_key(self):
+        """Fingerprint of every setting that changes the OCR text, for OCRCache"""
+        settings = {
+            'configs': OCR_CONFIGS,
+            'layout_config': LAYOUT_CONFIG,
+            'cascade': self.cascade,
+            'concurrent': self.concurrent,
+            'early_exit': [self.early_exit_lines, self.early_exit_confidence],
+            'single_pass': self.single_pass,
+            'split_columns': self.split_columns,
+            'tiles': [self.tile_height, self.tile_overlap],
+            'preprocessor': self.preprocessor.settings() if self.preprocessor is not None else None,
+            'locator': self.locator.settings() if self.locator is not None else None
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+    
     def extract_text(self, image):
         """Extract text from image using OCR"""
+        if self.cache is None:
+            return self._extract_text(image)
+        
+        keys = self.cache.image_keys(image, self.cache_key())
+        cached = self.cache.lookup(keys, PARSER_VERSION)
+        if cached is not None:
+            self._local.ocr_info = {'stage': 'cache', 'passes': 0}
+            return cached['text']
+        
+        text = self._extract_text(image)
+        self.cache.store(keys, text)
+        return text
+    
+    def process_receipt(self, image):
+        """Extract text and parse items from a receipt image, using the cache if set
+        
+        Returns an (extracted_text, items) tuple.
+        """
+        if self.cache is None:
+            text = self._extract_text(image)
+            return text, self.parse_items_and_prices(text) if text.strip() else []
+        
+        keys = self.cache.image_keys(image, self.cache_key())
+        cached = self.cache.lookup(keys, PARSER_VERSION)
+        if cached is not None and cached['items'] is not None:
+            self._local.ocr_info = {'stage': 'cache', 'passes': 0}
+            return cached['text'], cached['items']
+        
+        text = cached['text'] if cached is not None else self._extract_text(image)
+        items = self.parse_items_and_prices(text) if text.strip() else []
+        self.cache.store(keys, text, items, PARSER_VERSION)
+        return text, items
+    
+    def _extract_text(self, image):
+        """Run OCR on an image without consulting the cache"""
+        self._local.ocr_info = {'stage': None, 'passes': None}
         try:
-            # Preprocess the image
-            processed_image = self.preprocess_image(image)
-            
-            # Try multiple OCR configurations for better results
-            configs = [
-                # Standard configuration with expanded character set
-                r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,- $@/%&\'',
-                # Alternative configuration for better line detection
-                r'--oem 3 --psm 4',
-                # Fallback configuration
-                r'--oem 3 --psm 8'
-            ]
-            
-            best_text = ""
-            max_lines = 0
-            
-            for config in configs:
-                try:
-                    text = pytesseract.image_to_string(processed_image, config=config)
-                    lines = [line.strip() for line in text.split('\n') if line.strip()]
-                    if len(lines) > max_lines:
-                        max_lines = len(lines)
-                        best_text = text
-                except:
-                    continue
+            # Crop to the receipt and preprocess the image
+            processed_image = self._prepare_image(image)
             
-            return best_text.strip() if best_text else ""
+            if self.tile_height and processed_image.height > self.tile_height * 1.5:
+                self._local.ocr_info = {'stage': 'tiled', 'passes': None}
+                return self._extract_text_tiled(processed_image)
+            
+            return self._ocr_image(processed_image)
             
         except Exception as e:
             raise Exception(f"OCR processing failed: {str(e)}")
     
-    def parse_items_and_prices(self, text):
-        """Parse grocery items and prices from extracted text"""
-        items = []
-        lines = text.strip().split('\n')
+    def _ocr_image(self, processed_image):
+        """Run the configured OCR strategy on a preprocessed image"""
+        if self.cascade:
+            return self._extract_text_cascade(processed_image)
+        
+        if self.single_pass or self.split_columns:
+            return self.layout_to_text(self._extract_page_layout(processed_image))
+        
+        # Strips are already parallel across tile workers (see _ocr_strip)
+        if self.concurrent and not getattr(self._local, 'direct', False):
+            return self._extract_text_concurrent(processed_image)
+        
+        best_text = ""
+        max_lines = 0
+        
+        # Try multiple OCR configurations for better results
+        for config in OCR_CONFIGS:
+            try:
+                text = self._image_to_string(processed_image, config)
+                lines = [line.strip() for line in text.split('\n') if line.strip()]
+                if len(lines) > max_lines:
+                    max_lines = len(lines)
+                    best_text = text
+            except:
+                continue
+        
+        return best_text.strip() if best_text else ""
+    
+    def _extract_text_cascade(self, processed_image):
+        """Run cascade stages in order until one gives a good enough result"""
+        best = None
+        passes = 0
+        accepted = None
         
-        # More flexible grocery item patterns
-        item_patterns = [
-            # Pattern for items with prices like "ITEM NAME 12.99" or "ITEM NAME  12.99"
-            r'^([A-Za-z][A-Za-z0-9\s\-\&\'\.\,\/\%]{1,40})\s+(\d{1,3}\.\d{2})$',
-            # Pattern for items with prices like "ITEM NAME $12.99"
-            r'^([A-Za-z][A-Za-z0-9\s\-\&\'\.\,\/\%]{1,40})\s+\$(\d{1,3}\.\d{2})$',
-            # Pattern for quantity and items like "2 APPLES 5.99" or "1@ ITEM 3.99"
-            r'^\d+[@\s]+([A-Za-z][A-Za-z0-9\s\-\&\'\.\,\/\%]{1,40})\s+(\d{1,3}\.\d{2})$',
-            # Pattern for items with space and price "ITEM  5.99"
-            r'^([A-Za-z][A-Za-z0-9\s\-\&\'\.\,\/\%]{1,40})\s{2,}(\d{1,3}\.\d{2})$',
-            # Pattern for items on separate lines from prices
-            r'^([A-Za-z][A-Za-z0-9\s\-\&\'\.\,\/\%]{1,40})$'
+        for stage in self.cascade:
+            try:
+                data = self._image_to_data(processed_image, stage['config'])
+            except Exception:
+                continue
+            passes += 1
+            
+            text = self._text_from_data(data)
+            confidence = self._mean_confidence(data)
+            price_lines = sum(
+                1 for line in text.split('\n') if TRAILING_PRICE_PATTERN.search(line)
+            )
+            
+            result = {'text': text, 'stage': stage['name'],
+                      'confidence': confidence, 'price_lines': price_lines}
+            if best is None or (price_lines, confidence) > (best['price_lines'], best['confidence']):
+                best = result
+            
+            if (confidence >= stage.get('min_confidence', 0) and
+                    price_lines >= stage.get('min_price_lines', 0)):
+                accepted = result
+                break
+        
+        result = accepted or best
+        stage_name = result['stage'] if accepted else None
+        
+        with self._stats_lock:
+            self.cascade_stats['receipts'] += 1
+            self.cascade_stats['passes'] += passes
+            stages = self.cascade_stats['stages']
+            stages[stage_name] = stages.get(stage_name, 0) + 1
+        
+        self._local.ocr_info = {
+            'stage': stage_name,
+            'passes': passes,
+            'confidence': result['confidence'] if result else None,
+            'price_lines': result['price_lines'] if result else 0
+        }
+        return result['text'].strip() if result else ""
+    
+    @property
+    def last_ocr_info(self):
+        """Details of the last extraction on this thread
+        
+        A dict with 'stage' (the cascade stage that accepted the result, None
+        if no stage passed, 'cache' for cache hits or 'tiled' for strip OCR)
+        and 'passes' (tesseract passes run), plus 'confidence' and
+        'price_lines' for cascade results.
+        """
+        return getattr(self._local, 'ocr_info', {'stage': None, 'passes': None})
+    
+    def _extract_text_tiled(self, processed_image):
+        """OCR a tall receipt as overlapping horizontal strips in parallel"""
+        if self._tile_executor is None:
+            self._tile_executor = ThreadPoolExecutor(
+                max_workers=self.tile_workers, thread_name_prefix='ocr-tile'
+            )
+        
+        strips = [
+            processed_image.crop((0, top, processed_image.width, bottom))
+            for top, bottom in self._tile_bounds(processed_image)
         ]
+        texts = list(self._tile_executor.map(self._ocr_strip, strips))
+        
+        # Stitch strips back together, dropping lines repeated across a seam
+        lines = []
+        for text in texts:
+            strip_lines = [line for line in text.split('\n') if line.strip()]
+            overlap = self._seam_overlap(lines, strip_lines)
+            lines.extend(strip_lines[overlap:])
+        
+        return '\n'.join(lines).strip()
+    
+    def _ocr_strip(self, strip):
+        """OCR one strip entirely on the calling tile thread
+        
+        Configs run one after another and tesseract is called directly, so
+        the number of strips OCRed at once follows tile_workers instead of
+        queueing on the shared config executor and the worker pool.
+        """
+        self._local.direct = True
+        try:
+            return self._ocr_image(strip)
+        finally:
+            self._local.direct = False
+    
+    def _tile_bounds(self, processed_image):
+        """(top, bottom) rows of overlapping strips, cut at blank rows between text lines"""
+        pixels = np.asarray(processed_image.convert('L'), dtype=np.uint8)
+        height = pixels.shape[0]
+        
+        # Ink per row; blank rows are those close to the emptiest row
+        ink = (pixels < 128).sum(axis=1)
+        blank = ink <= ink.min() + max(1, pixels.shape[1] // 200)
+        
+        cuts = [0]
+        # Whether each cut fell on a blank row (no line to lose, so no overlap)
+        clean = [True]
+        while height - cuts[-1] > self.tile_height * 1.5:
+            target = cuts[-1] + self.tile_height
+            # Nearest blank row within a quarter tile of the target
+            window = self.tile_height // 4
+            low, high = target - window, min(height - 1, target + window)
+            candidates = np.flatnonzero(blank[low:high])
+            if len(candidates):
+                cut = low + int(candidates[np.argmin(np.abs(candidates + low - target))])
+            else:
+                cut = target
+            cuts.append(cut)
+            clean.append(bool(len(candidates)))
+        cuts.append(height)
+        clean.append(True)
+        
+        return [
+            (max(0, top - (0 if clean[index] else self.tile_overlap)),
+             min(height, bottom + (0 if clean[index + 1] else self.tile_overlap)))
+            for index, (top, bottom) in enumerate(zip(cuts, cuts[1:]))
+        ]
+    
+    def _seam_overlap(self, previous_lines, next_lines, max_lines=2):
+        """Number of leading lines of a strip that repeat the end of the previous one"""
+        normalize = lambda line: re.sub(r'\s+', ' ', line.strip().upper())
+        for count in range(min(max_lines, len(previous_lines), len(next_lines)), 0, -1):
+            tail = [normalize(line) for line in previous_lines[-count:]]
+            head = [normalize(line) for line in next_lines[:count]]
+            if tail == head:
+                return count
+        return 0
+    
+    def _extract_text_concurrent(self, processed_image):
+        """Run all OCR configurations in parallel, returning early on a good result"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='ocr'
+            )
+        
+        futures = {
+            self._executor.submit(self._run_config, processed_image, config): index
+            for index, config in enumerate(OCR_CONFIGS)
+        }
         
-        # More flexible price patterns
-        price_patterns = [
-            r'^\$?(\d{1,3}\.\d{2})$',
-            r'^(\d{1,3}\.\d{2})$',
-            r'^\$(\d{1,3}\.\d{2})\s*$'
+        best_text = ""
+        best_key = (0, 0)
+        
+        try:
+            for future in as_completed(futures):
+                try:
+                    text, confidence = future.result()
+                except Exception:
+                    continue
+                
+                line_count = len([line for line in text.split('\n') if line.strip()])
+                
+                if self._passes_quality_threshold(line_count, confidence):
+                    return text.strip()
+                
+                # Same selection as the sequential path: most lines wins and
+                # ties go to the config listed first
+                key = (line_count, -futures[future])
+                if line_count > 0 and key > best_key:
+                    best_key = key
+                    best_text = text
+        finally:
+            # Drop configs that haven't started yet; running ones finish in
+            # the background and their results are discarded
+            for future in futures:
+                future.cancel()
+        
+        return best_text.strip() if best_text else ""
+    
+    def _run_config(self, processed_image, config):
+        """Run a single tesseract configuration, returning (text, mean word confidence)"""
+        if self.early_exit_confidence is None:
+            return self._image_to_string(processed_image, config), None
+        
+        # Word confidences are only available from image_to_data
+        data = self._image_to_data(processed_image, config)
+        return self._text_from_data(data), self._mean_confidence(data)
+    
+    def _get_pool(self):
+        """Start the OCR worker pool on first use (None when disabled or on a strip thread)"""
+        if getattr(self._local, 'direct', False):
+            return None
+        if self._pool is None and self.pool_size > 0:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = OCRWorkerPool(size=self.pool_size)
+        return self._pool
+    
+    def _image_to_string(self, image, config):
+        """Run image_to_string on the worker pool if enabled, otherwise via pytesseract"""
+        pool = self._get_pool()
+        if pool is not None:
+            return pool.image_to_string(image, config)
+        return pytesseract.image_to_string(image, config=config)
+    
+    def _image_to_data(self, image, config):
+        """Run image_to_data (Output.DICT) on the worker pool if enabled, otherwise via pytesseract"""
+        pool = self._get_pool()
+        if pool is not None:
+            return pool.image_to_data(image, config)
+        return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+    
+    def close(self):
+        """Shut down the thread pool and OCR worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._tile_executor is not None:
+            self._tile_executor.shutdown(wait=False, cancel_futures=True)
+            self._tile_executor = None
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+    
+    def _passes_quality_threshold(self, line_count, confidence):
+        """Check whether an OCR result is good enough to skip the remaining configs"""
+        if self.early_exit_lines is None or line_count < self.early_exit_lines:
+            return False
+        if self.early_exit_confidence is not None:
+            return confidence is not None and confidence >= self.early_exit_confidence
+        return True
+    
+    def _text_from_data(self, data):
+        """Rebuild plain text from image_to_data output, one line per tesseract line"""
+        lines = {}
+        for i, word in enumerate(data['text']):
+            if not word or not word.strip():
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(word.strip())
+        
+        return '\n'.join(' '.join(words) for key, words in sorted(lines.items()))
+    
+    def _mean_confidence(self, data):
+        """Mean tesseract confidence (0-100) over recognized words"""
+        confidences = [
+            float(conf) for word, conf in zip(data['text'], data['conf'])
+            if word and word.strip() and float(conf) >= 0
         ]
+        return sum(confidences) / len(confidences) if confidences else 0.0
+    
+    def extract_layout(self, image):
+        """Extract receipt lines with word positions from a single OCR pass"""
+        try:
+            return self._extract_page_layout(self._prepare_image(image))
+        except Exception as e:
+            raise Exception(f"OCR processing failed: {str(e)}")
+    
+    def _prepare_image(self, image):
+        """Crop to the receipt paper (if a locator is set) and preprocess"""
+        if self.locator is not None:
+            image = self.locator.crop(image)
+        return self.preprocess_image(image)
+    
+    def _extract_page_layout(self, processed_image):
+        """Layout rows for a whole receipt, OCRing name and price columns separately if enabled"""
+        if self.split_columns:
+            columns = self.locator.split_columns(processed_image)
+            if columns is not None:
+                name_image, price_image, split_x = columns
+                return self._merge_column_layouts(
+                    self._extract_layout(name_image),
+                    self._extract_layout(price_image),
+                    split_x
+                )
+        return self._extract_layout(processed_image)
+    
+    def _merge_column_layouts(self, name_rows, price_rows, split_x):
+        """Attach each price-column row to the name row it overlaps vertically
+        
+        Price rows are in the price column's own coordinates, offset by split_x.
+        """
+        prices = []
+        for row in price_rows:
+            price_match = PRICE_TOKEN_PATTERN.match(row['words'][-1]['text'])
+            if price_match:
+                prices.append((row, float(price_match.group(1))))
+        
+        merged = [dict(row, price=None, price_left=None, name=row['text']) for row in name_rows]
+        unmatched = []
+        for price_row, price in prices:
+            center = (price_row['top'] + price_row['bottom']) / 2
+            target = next(
+                (row for row in merged
+                 if row['price'] is None and row['top'] <= center <= row['bottom']),
+                None
+            )
+            if target is not None:
+                target['price'] = price
+                target['price_left'] = price_row['left'] + split_x
+            else:
+                # Price on its own row; the parser pairs it with the name above
+                unmatched.append(dict(price_row, name='', price=price,
+                                      left=price_row['left'] + split_x,
+                                      right=price_row['right'] + split_x,
+                                      price_left=price_row['left'] + split_x))
+        
+        return sorted(merged + unmatched, key=lambda row: row['top'])
+    
+    def _extract_layout(self, processed_image):
+        """Rebuild receipt rows from image_to_data word boxes
+        
+        Returns a list of row dicts, top to bottom, with the keys 'text',
+        'words', 'left', 'top', 'right', 'bottom', 'conf', 'name', 'price'
+        and 'price_left'. 'price' is the right-aligned price token of the row
+        (or None) and 'name' is the text to the left of it.
+        """
+        data = self._image_to_data(processed_image, LAYOUT_CONFIG)
+        
+        words = []
+        for i, text in enumerate(data['text']):
+            if not text or not text.strip() or float(data['conf'][i]) < 0:
+                continue
+            words.append({
+                'text': text.strip(),
+                'left': data['left'][i],
+                'top': data['top'][i],
+                'right': data['left'][i] + data['width'][i],
+                'bottom': data['top'][i] + data['height'][i],
+                'conf': float(data['conf'][i])
+            })
+        
+        if not words:
+            return []
+        
+        # Group words into rows by vertical overlap rather than tesseract's own
+        # line numbers, which split a name and a far-away price into separate blocks
+        rows = []
+        for word in sorted(words, key=lambda w: (w['top'] + w['bottom']) / 2):
+            center = (word['top'] + word['bottom']) / 2
+            row = rows[-1] if rows else None
+            if row is not None and row['top'] <= center <= row['bottom']:
+                row['words'].append(word)
+                row['top'] = min(row['top'], word['top'])
+                row['bottom'] = max(row['bottom'], word['bottom'])
+            else:
+                rows.append({'words': [word], 'top': word['top'], 'bottom': word['bottom']})
+        
+        # Prices are right-aligned, so only tokens ending in the right part of
+        # the text area count as the price column
+        text_left = min(w['left'] for w in words)
+        text_right = max(w['right'] for w in words)
+        price_column_start = text_left + (text_right - text_left) * 0.5
+        
+        layout = []
+        for row in rows:
+            row_words = sorted(row['words'], key=lambda w: w['left'])
+            
+            price = None
+            price_left = None
+            name_words = row_words
+            last = row_words[-1]
+            price_match = PRICE_TOKEN_PATTERN.match(last['text'])
+            if price_match and last['right'] >= price_column_start:
+                price = float(price_match.group(1))
+                price_left = last['left']
+                name_words = row_words[:-1]
+            
+            name = ' '.join(w['text'] for w in name_words)
+            layout.append({
+                'text': ' '.join(w['text'] for w in row_words),
+                'words': row_words,
+                'left': row_words[0]['left'],
+                'top': row['top'],
+                'right': max(w['right'] for w in row_words),
+                'bottom': row['bottom'],
+                'conf': sum(w['conf'] for w in row_words) / len(row_words),
+                'name': name,
+                'price': price,
+                'price_left': price_left
+            })
+        
+        return layout
+    
+    def layout_to_text(self, layout):
+        """Render layout rows as text with the price column separated by two spaces"""
+        lines = []
+        for row in layout:
+            if row['price'] is not None and row['name']:
+                lines.append(f"{row['name']}  {row['price']:.2f}")
+            else:
+                lines.append(row['text'])
+        return '\n'.join(lines)
+    
+    def parse_items_and_prices(self, text):
+        """Parse grocery items and prices from extracted text or layout rows"""
+        if isinstance(text, list):
+            # Layout rows from extract_layout already have the price column split out
+            items = self._parse_layout(text)
+            if items:
+                return self._unique_items(items)
+            text = self.layout_to_text(text)
+        
+        items = []
+        lines = text.strip().split('\n')
+        line_count = len(lines)
         
         i = 0
-        while i < len(lines):
+        while i < line_count:
             line = lines[i].strip()
             
-            if not line or len(line) < 3:
+            # Skip short lines, receipt headers/footers and non-item lines
+            if len(line) < 3 or SKIP_PATTERN.search(line.upper()):
                 i += 1
                 continue
             
-            # Skip common receipt headers/footers and non-item lines
-            skip_patterns = [
-                r'RECEIPT', r'TOTAL', r'SUBTOTAL', r'TAX', r'CHANGE', r'CASH',
-                r'CREDIT', r'DEBIT', r'THANK YOU', r'STORE', r'DATE', r'TIME',
-                r'CASHIER', r'REG#', r'TRANS#', r'BALANCE', r'TENDER', r'VISA',
-                r'MASTERCARD', r'AMEX', r'DISCOVER', r'CARD', r'APPROVED',
-                r'WELCOME', r'SAVE', r'COUPON', r'DISCOUNT', r'MEMBER',
-                r'REWARDS', r'POINTS', r'PHONE', r'ADDRESS', r'STREET',
-                r'CITY', r'STATE', r'ZIP', r'^\d{1,2}\/\d{1,2}\/\d{2,4}$',  # dates
-                r'^\d{1,2}:\d{2}$',  # times
-                r'^[A-Z]{2,}\s+\d+$',  # store codes
-                r'^\*+$', r'^-+$', r'^=+$'  # separators
-            ]
-            
-            if any(re.search(pattern, line.upper()) for pattern in skip_patterns):
-                i += 1
-                continue
+            # Item with price on the same line
+            match = PRICED_LINE_PATTERN.match(line)
+            if match:
+                item_name = (match.group('name') or match.group('quantity_name')).strip().title()
+                price = float(match.group('price'))
+                item_name_clean = self.clean_item_name(item_name)
+                
+                if self._is_valid_item(item_name_clean, price):
+                    items.append({
+                        'item': item_name_clean,
+                        'price': price
+                    })
+                    i += 1
+                    continue
             
-            # Try to match item with price on same line
-            matched = False
-            for pattern in item_patterns:
-                match = re.match(pattern, line, re.IGNORECASE)
-                if match:
-                    if len(match.groups()) == 2:
-                        item_name = match.group(1).strip().title()
-                        price = float(match.group(2))
-                        
-                        # Clean item name and validate
-                        item_name_clean = self.clean_item_name(item_name)
-                        
-                        # Validate price range and item name
-                        if (0.01 <= price <= 999.99 and 
-                            len(item_name_clean) >= 2 and
-                            not re.match(r'^\d+$', item_name_clean) and  # not just numbers
-                            not re.match(r'^[^A-Za-z]*$', item_name_clean)):  # contains letters
-                            items.append({
-                                'item': item_name_clean,
-                                'price': price
-                            })
-                            matched = True
-                            break
-                    elif len(match.groups()) == 1:
-                        # Item name only, look for price on next line
-                        item_name = match.group(1).strip().title()
-                        if i + 1 < len(lines):
-                            next_line = lines[i + 1].strip()
-                            for price_pattern in price_patterns:
-                                price_match = re.match(price_pattern, next_line)
-                                if price_match:
-                                    price = float(price_match.group(1))
-                                    if 0.01 <= price <= 999.99:
-                                        items.append({
-                                            'item': item_name,
-                                            'price': price
-                                        })
-                                        matched = True
-                                        i += 1  # Skip the price line
-                                        break
-                        if matched:
-                            break
+            # Item name only, look for price on next line
+            match = NAME_ONLY_PATTERN.match(line)
+            if match and i + 1 < line_count:
+                price_match = PRICE_ONLY_PATTERN.match(lines[i + 1].strip())
+                if price_match:
+                    price = float(price_match.group(1))
+                    if 0.01 <= price <= 999.99:
+                        items.append({
+                            'item': match.group(1).strip().title(),
+                            'price': price
+                        })
+                        i += 1  # Skip the price line
             
             i += 1
         
@@ -168,7 +724,57 @@ class OCRProcessor:
         if not items:
             items = self.fallback_parsing(lines)
         
-        # Filter out duplicate items and clean up
+        return self._unique_items(items)
+    
+    def _parse_layout(self, layout):
+        """Pair item names with right-aligned prices using layout row geometry"""
+        items = []
+        pending_name = None
+        
+        for row in layout:
+            name = row['name'].strip()
+            
+            if row['price'] is None:
+                # A name without a price may have its price on the row below
+                if len(name) >= 3 and not self._is_skip_line(name):
+                    pending_name = name
+                else:
+                    pending_name = None
+                continue
+            
+            if not name and pending_name:
+                name = pending_name
+            pending_name = None
+            
+            if len(name) < 3 or self._is_skip_line(name):
+                continue
+            
+            # Drop a leading quantity like "2 " or "1@ "
+            name = QUANTITY_PREFIX_PATTERN.sub('', name)
+            item_name_clean = self.clean_item_name(name)
+            price = row['price']
+            
+            if self._is_valid_item(item_name_clean, price):
+                items.append({
+                    'item': item_name_clean,
+                    'price': price
+                })
+        
+        return items
+    
+    def _is_skip_line(self, line):
+        """Check for receipt headers/footers and other non-item lines"""
+        return SKIP_PATTERN.search(line.upper()) is not None
+    
+    def _is_valid_item(self, item_name, price):
+        """Validate price range and a cleaned item name"""
+        return (0.01 <= price <= 999.99 and
+                len(item_name) >= 2 and
+                not DIGITS_ONLY_PATTERN.match(item_name) and  # not just numbers
+                not NO_LETTERS_PATTERN.match(item_name))  # contains letters
+    
+    def _unique_items(self, items):
+        """Filter out duplicate items"""
         seen_items = set()
         unique_items = []
         
@@ -191,14 +797,14 @@ class OCRProcessor:
                 continue
                 
             # Very broad pattern to catch price at end of line
-            match = re.search(r'([A-Za-z][A-Za-z0-9\s\-\&\'\.\,\/\%]+?)\s+(\d{1,3}\.\d{2})\s*$', line)
+            match = FALLBACK_LINE_PATTERN.search(line)
             if match:
                 item_name = self.clean_item_name(match.group(1))
                 try:
                     price = float(match.group(2))
                     if (0.01 <= price <= 999.99 and 
                         len(item_name) >= 2 and
-                        not re.match(r'^\d+$', item_name)):
+                        not DIGITS_ONLY_PATTERN.match(item_name)):
                         items.append({
                             'item': item_name,
                             'price': price
@@ -211,20 +817,14 @@ class OCRProcessor:
     def clean_item_name(self, item_name):
         """Clean and standardize item names"""
         # Remove extra whitespace
-        item_name = re.sub(r'\s+', ' ', item_name.strip())
+        item_name = WHITESPACE_PATTERN.sub(' ', item_name.strip())
         
         # Remove common prefixes/suffixes that don't help identification
-        item_name = re.sub(r'^(ORGANIC|ORG|FRESH|PREMIUM|SELECT)\s+', '', item_name, flags=re.IGNORECASE)
+        item_name = NAME_PREFIX_PATTERN.sub('', item_name)
         
         # Standardize common abbreviations
-        replacements = {
-            r'\bLB\b': 'POUND',
-            r'\bOZ\b': 'OUNCE',
-            r'\bPKG\b': 'PACKAGE',
-            r'\bCT\b': 'COUNT'
-        }
-        
-        for pattern, replacement in replacements.items():
-            item_name = re.sub(pattern, replacement, item_name, flags=re.IGNORECASE)
+        item_name = ABBREVIATION_PATTERN.sub(
+            lambda match: ABBREVIATIONS[match.group(1).upper()], item_name
+        )
         
         return item_name.title()
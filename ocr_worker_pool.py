@@ -0,0 +1,272 @@
+import importlib.util
+import multiprocessing
+import queue
+import re
+import threading
+import time
+from PIL import Image
+
+def tesserocr_available():
+    """Check whether workers can keep an engine loaded (tesserocr installed)
+
+    Without tesserocr each worker still runs the tesseract binary per call,
+    which only adds a process hop and an extra pixel copy over plain
+    pytesseract, so callers shouldn't enable the pool then.
+    """
+    return importlib.util.find_spec('tesserocr') is not None
+
+def _parse_config(config):
+    """Split a tesseract command line config into (psm, variables)"""
+    psm_match = re.search(r'--psm\s+(\d+)', config or '')
+    psm = int(psm_match.group(1)) if psm_match else 3
+    variables = dict(re.findall(r'-c\s+(\w+)=(\S+)', config or ''))
+    return psm, variables
+
+def _tesserocr_data(api, tesserocr):
+    """Collect word boxes from a tesserocr engine in pytesseract's image_to_data DICT layout"""
+    data = {key: [] for key in ['text', 'left', 'top', 'width', 'height', 'conf',
+                                'block_num', 'par_num', 'line_num']}
+    RIL = tesserocr.RIL
+    iterator = api.GetIterator()
+    if iterator is None:
+        return data
+    
+    block_num = par_num = line_num = 0
+    while True:
+        if iterator.IsAtBeginningOf(RIL.BLOCK):
+            block_num += 1
+            par_num = line_num = 0
+        if iterator.IsAtBeginningOf(RIL.PARA):
+            par_num += 1
+            line_num = 0
+        if iterator.IsAtBeginningOf(RIL.TEXTLINE):
+            line_num += 1
+        
+        word = iterator.GetUTF8Text(RIL.WORD)
+        box = iterator.BoundingBox(RIL.WORD)
+        if word and box:
+            left, top, right, bottom = box
+            data['text'].append(word)
+            data['left'].append(left)
+            data['top'].append(top)
+            data['width'].append(right - left)
+            data['height'].append(bottom - top)
+            data['conf'].append(iterator.Confidence(RIL.WORD))
+            data['block_num'].append(block_num)
+            data['par_num'].append(par_num)
+            data['line_num'].append(line_num)
+        
+        if not iterator.Next(RIL.WORD):
+            break
+    
+    return data
+
+def _worker_main(conn, lang):
+    """Worker process loop: keeps one OCR engine loaded and serves requests over a pipe"""
+    try:
+        # tesserocr keeps the engine and language model in memory between calls
+        import tesserocr
+        api = tesserocr.PyTessBaseAPI(lang=lang)
+        engine = 'tesserocr'
+    except Exception:
+        # Without tesserocr each call still runs the tesseract binary, but the
+        # image arrives over the pipe and the worker process stays warm
+        import pytesseract
+        tesserocr = None
+        api = None
+        engine = 'pytesseract'
+    
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        
+        command = message[0]
+        if command == 'stop':
+            break
+        if command == 'ping':
+            conn.send(('pong', engine))
+            continue
+        
+        # ('ocr' | 'data', mode, size, config) followed by the raw pixel buffer
+        _, mode, size, config = message
+        buffer = conn.recv_bytes()
+        try:
+            image = Image.frombytes(mode, size, buffer)
+            if api is not None:
+                psm, variables = _parse_config(config)
+                api.SetPageSegMode(psm)
+                for name, value in variables.items():
+                    api.SetVariable(name, value)
+                api.SetImage(image)
+                api.Recognize()
+                result = api.GetUTF8Text() if command == 'ocr' else _tesserocr_data(api, tesserocr)
+                # Variables persist on the engine, so undo them for the next request
+                api.Clear()
+                for name in variables:
+                    api.SetVariable(name, '')
+            elif command == 'ocr':
+                result = pytesseract.image_to_string(image, config=config)
+            else:
+                result = pytesseract.image_to_data(
+                    image, config=config, output_type=pytesseract.Output.DICT
+                )
+            conn.send(('ok', result))
+        except Exception as e:
+            conn.send(('error', str(e)))
+    
+    if api is not None:
+        api.End()
+    conn.close()
+
+class OCRWorkerPool:
+    def __init__(self, size=2, lang='eng', request_timeout=60, health_check_interval=30):
+        self.size = size
+        self.lang = lang
+        # Seconds to wait for a single OCR request before treating the worker as hung
+        self.request_timeout = request_timeout
+        self.health_check_interval = health_check_interval
+        
+        self.stats = {'requests': 0, 'restarts': 0, 'errors': 0}
+        
+        # spawn keeps workers independent of the threads running in the parent
+        self._context = multiprocessing.get_context('spawn')
+        self._workers = [self._start_worker() for _ in range(size)]
+        self._idle = queue.Queue()
+        for slot in range(size):
+            self._idle.put(slot)
+        
+        self._closed = False
+        self._monitor = None
+        if health_check_interval:
+            self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+            self._monitor.start()
+    
+    def _start_worker(self):
+        """Start a worker process and return (process, parent end of its pipe)"""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(child_conn, self.lang), daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+    
+    def _restart_worker(self, slot):
+        """Replace a crashed or unresponsive worker"""
+        process, conn = self._workers[slot]
+        if process.is_alive():
+            process.terminate()
+        process.join(timeout=5)
+        conn.close()
+        
+        self._workers[slot] = self._start_worker()
+        self.stats['restarts'] += 1
+    
+    def image_to_string(self, image, config=''):
+        """OCR an image on a warm worker (same result as pytesseract.image_to_string)"""
+        return self._request('ocr', image, config)
+    
+    def image_to_data(self, image, config=''):
+        """Word boxes for an image on a warm worker, in pytesseract's Output.DICT layout"""
+        return self._request('data', image, config)
+    
+    def _request(self, command, image, config):
+        """Send a request to an idle worker, restarting it and retrying once if it dies"""
+        if self._closed:
+            raise RuntimeError("OCR worker pool is closed")
+        
+        if image.mode not in ('L', 'RGB', '1'):
+            image = image.convert('RGB')
+        header = (command, image.mode, image.size, config)
+        buffer = image.tobytes()
+        
+        slot = self._idle.get()
+        try:
+            for attempt in range(2):
+                process, conn = self._workers[slot]
+                try:
+                    if not process.is_alive():
+                        raise EOFError("worker is not running")
+                    conn.send(header)
+                    conn.send_bytes(buffer)
+                    if not conn.poll(self.request_timeout):
+                        raise TimeoutError("worker did not respond")
+                    status, result = conn.recv()
+                except (EOFError, OSError, TimeoutError):
+                    self._restart_worker(slot)
+                    if attempt == 0:
+                        continue
+                    self.stats['errors'] += 1
+                    raise RuntimeError("OCR worker crashed")
+                
+                self.stats['requests'] += 1
+                if status == 'error':
+                    self.stats['errors'] += 1
+                    raise RuntimeError(result)
+                return result
+        finally:
+            self._idle.put(slot)
+    
+    def health_check(self):
+        """Ping every idle worker and restart the ones that are dead or unresponsive
+        
+        Returns a list with one status dict per checked worker.
+        """
+        statuses = []
+        # Only check workers that aren't busy so requests are never interrupted
+        for _ in range(self.size):
+            try:
+                slot = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                process, conn = self._workers[slot]
+                healthy = False
+                engine = None
+                try:
+                    if process.is_alive():
+                        conn.send(('ping',))
+                        if conn.poll(5):
+                            _, engine = conn.recv()
+                            healthy = True
+                except (EOFError, OSError):
+                    pass
+                
+                if not healthy:
+                    self._restart_worker(slot)
+                statuses.append({
+                    'slot': slot,
+                    'healthy': healthy,
+                    'engine': engine,
+                    'pid': self._workers[slot][0].pid
+                })
+            finally:
+                self._idle.put(slot)
+        
+        return statuses
+    
+    def _monitor_loop(self):
+        """Background health checks"""
+        while not self._closed:
+            time.sleep(self.health_check_interval)
+            if self._closed:
+                break
+            try:
+                self.health_check()
+            except Exception as e:
+                print(f"OCR worker health check failed: {e}")
+    
+    def close(self):
+        """Stop all workers"""
+        self._closed = True
+        for process, conn in self._workers:
+            try:
+                conn.send(('stop',))
+            except (EOFError, OSError):
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
@@ -0,0 +1,172 @@
+import numpy as np
+from PIL import Image
+
+class ReceiptLocator:
+    def __init__(self, analysis_size=500, padding=0.02, min_area=0.05, max_area=0.9):
+        # Long side, in pixels, of the downscaled copy used for detection
+        self.analysis_size = analysis_size
+        # Margin added around the detected paper, as a fraction of its size
+        self.padding = padding
+        # Detections covering less or more of the photo than this are ignored
+        self.min_area = min_area
+        self.max_area = max_area
+    
+    def settings(self):
+        """Parameters that change the located crop, e.g. for cache keys"""
+        return {
+            'analysis_size': self.analysis_size,
+            'padding': self.padding,
+            'min_area': self.min_area,
+            'max_area': self.max_area
+        }
+    
+    def locate(self, image):
+        """Find the receipt paper in a photo
+        
+        Returns a (left, top, right, bottom) box in full-resolution pixels, or
+        None when no clear receipt region is found.
+        """
+        small, scale = self._downscale(image)
+        pixels = np.asarray(small, dtype=np.uint8)
+        height, width = pixels.shape
+        
+        # Receipt paper is the bright part of the photo. Taking the brightest
+        # pixel of each small block removes the printed text from the paper
+        block = max(1, max(height, width) // 100)
+        brightest = self._max_pool(pixels, block)
+        paper = brightest > self._otsu_threshold(brightest)
+        
+        # Projection profiles: the paper strip is the longest run of columns
+        # that are mostly bright, and within it the rows that are mostly bright
+        column_profile = paper.mean(axis=0)
+        left, right = self._longest_run(column_profile > 0.5 * column_profile.max())
+        row_profile = paper[:, left:right].mean(axis=1)
+        top, bottom = self._longest_run(row_profile > 0.5)
+        if right <= left or bottom <= top:
+            return None
+        
+        # Snap each bound to the strongest paper/background edge near it
+        pooled_height, pooled_width = brightest.shape
+        column_means = brightest[top:bottom].mean(axis=0)
+        row_means = brightest[:, left:right].mean(axis=1)
+        left = self._snap_to_edge(column_means, left, pooled_width // 20)
+        right = self._snap_to_edge(column_means, right, pooled_width // 20)
+        top = self._snap_to_edge(row_means, top, pooled_height // 20)
+        bottom = self._snap_to_edge(row_means, bottom, pooled_height // 20)
+        left, right, top, bottom = left * block, right * block, top * block, bottom * block
+        
+        area = (right - left) * (bottom - top) / float(width * height)
+        if not self.min_area <= area <= self.max_area:
+            return None
+        
+        pad_x = int((right - left) * self.padding) + 1
+        pad_y = int((bottom - top) * self.padding) + 1
+        return (
+            max(0, int((left - pad_x) / scale)),
+            max(0, int((top - pad_y) / scale)),
+            min(image.width, int((right + pad_x) / scale)),
+            min(image.height, int((bottom + pad_y) / scale))
+        )
+    
+    def crop(self, image):
+        """Crop a photo to the receipt paper, or return it unchanged if none is found"""
+        box = self.locate(image)
+        return image.crop(box) if box else image
+    
+    def split_columns(self, image, min_gap=0.02):
+        """Split a receipt crop into item-name and price columns
+        
+        Looks for the widest ink-free vertical gap in the right half of the
+        receipt. Returns (name_image, price_image, split_x) or None when there
+        is no clear price column.
+        """
+        small, scale = self._downscale(image)
+        pixels = np.asarray(small, dtype=np.uint8)
+        width = pixels.shape[1]
+        
+        ink = pixels < self._otsu_threshold(pixels)
+        ink_profile = ink.mean(axis=0)
+        
+        # Price column starts somewhere in the right half; ignore the margins
+        search_start = width // 2
+        search_end = width - width // 20
+        if search_end <= search_start:
+            return None
+        
+        # Columns no darker than the emptiest one (crop padding can leave a
+        # little background at the top and bottom of every column)
+        floor = ink_profile[search_start:search_end].min()
+        empty = ink_profile <= floor + max(0.002, ink_profile.max() * 0.02)
+        best_start = best_length = 0
+        run_start = None
+        for x in range(search_start, search_end + 1):
+            if x < search_end and empty[x]:
+                if run_start is None:
+                    run_start = x
+            elif run_start is not None:
+                if x - run_start > best_length:
+                    best_start, best_length = run_start, x - run_start
+                run_start = None
+        
+        if best_length < max(1, int(width * min_gap)):
+            return None
+        # Make sure there is ink on both sides of the gap
+        if not ink_profile[:best_start].any() or not ink_profile[best_start + best_length:].any():
+            return None
+        
+        split_x = int((best_start + best_length // 2) / scale)
+        name_image = image.crop((0, 0, split_x, image.height))
+        price_image = image.crop((split_x, 0, image.width, image.height))
+        return name_image, price_image, split_x
+    
+    def _downscale(self, image):
+        """Grayscale copy with the long side at most analysis_size, and its scale factor"""
+        gray = image.convert('L') if image.mode != 'L' else image
+        scale = min(1.0, self.analysis_size / float(max(gray.size)))
+        if scale < 1.0:
+            size = (max(1, int(gray.width * scale)), max(1, int(gray.height * scale)))
+            gray = gray.resize(size, resample=Image.BILINEAR, reducing_gap=2.0)
+            scale = gray.width / float(image.width)
+        return gray, scale
+    
+    def _max_pool(self, pixels, block):
+        """Brightest pixel of each block x block tile"""
+        if block == 1:
+            return pixels
+        height = pixels.shape[0] // block * block
+        width = pixels.shape[1] // block * block
+        tiles = pixels[:height, :width].reshape(height // block, block, width // block, block)
+        return tiles.max(axis=(1, 3))
+    
+    def _otsu_threshold(self, pixels):
+        """Otsu's threshold from the grayscale histogram"""
+        histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+        levels = np.arange(256)
+        weight_dark = np.cumsum(histogram)
+        weight_light = weight_dark[-1] - weight_dark
+        sum_dark = np.cumsum(histogram * levels)
+        mean_dark = sum_dark / np.maximum(weight_dark, 1)
+        mean_light = (sum_dark[-1] - sum_dark) / np.maximum(weight_light, 1)
+        between = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+        return int(np.argmax(between))
+    
+    def _longest_run(self, mask):
+        """(start, end) of the longest run of True values in a 1D mask"""
+        padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+        changes = np.flatnonzero(np.diff(padded))
+        if len(changes) == 0:
+            return 0, 0
+        starts, ends = changes[::2], changes[1::2]
+        longest = int(np.argmax(ends - starts))
+        return int(starts[longest]), int(ends[longest])
+    
+    def _snap_to_edge(self, profile, position, margin):
+        """Move a bound to the largest brightness change within margin of it"""
+        if margin < 1 or len(profile) < 2:
+            return position
+        gradient = np.abs(np.diff(profile))
+        low = max(0, position - margin)
+        high = min(len(gradient), position + margin)
+        if high <= low:
+            return position
+        return low + int(np.argmax(gradient[low:high])) + 1
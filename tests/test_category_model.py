@@ -0,0 +1,27 @@
+from category_model import CategoryModel
+from item_categorizer import ItemCategorizer
+
+class LabelSource:
+    """Stand-in for Database with a fixed set of saved item labels"""
+    
+    def __init__(self, labels=()):
+        self.labels = [{'item_name': name, 'category': category, 'count': 1} for name, category in labels]
+    
+    def get_category_labels(self):
+        return self.labels
+    
+    def get_labeled_item_count(self):
+        return sum(1 for row in self.labels if row['category'] != 'Other')
+
+def test_non_food_names_are_predicted_other(tmp_path):
+    model = CategoryModel(model_path=str(tmp_path / 'model.pkl'))
+    model.train(LabelSource(), ItemCategorizer())
+    
+    assert model.predict_many(['Paper Towels', 'Toilet Paper', 'Dish Soap']) == ['Other'] * 3
+    assert model.predict('mozzarela') == 'Dairy'
+
+def test_saved_other_labels_are_trained(tmp_path):
+    model = CategoryModel(model_path=str(tmp_path / 'model.pkl'))
+    names, labels, _ = model.training_data(LabelSource([('KITTY LITTER', 'Other')]), ItemCategorizer())
+    
+    assert labels[names.index('kitty litter')] == 'Other'
@@ -0,0 +1,36 @@
+from database import Database
+from item_categorizer import ItemCategorizer
+
+def test_custom_mappings_checked_once_per_interval(tmp_path):
+    db = Database(str(tmp_path / 'grocery.db'))
+    checks = []
+    get_version = db.get_custom_mappings_version
+    db.get_custom_mappings_version = lambda: checks.append(1) or get_version()
+    
+    categorizer = ItemCategorizer(database=db, reload_interval=60)
+    for _ in range(100):
+        categorizer.categorize_item('BANANAS')
+    
+    assert len(checks) == 1
+
+def test_corrections_from_another_instance_are_picked_up(tmp_path):
+    db = Database(str(tmp_path / 'grocery.db'))
+    first = ItemCategorizer(database=db, reload_interval=0)
+    second = ItemCategorizer(database=db, reload_interval=0)
+    assert second.categorize_item('ZORBLAX') == 'Other'
+    
+    first.add_custom_mapping('ZORBLAX', 'Snacks')
+    version = first.cache_version()
+    
+    assert second.categorize_item('zorblax') == 'Snacks'
+    # Reloading its own save leaves the first instance's cached results valid
+    assert first.categorize_item('zorblax') == 'Snacks'
+    assert first.cache_version() == version
+
+def test_multi_word_misreadings_are_corrected_per_word():
+    categorizer = ItemCategorizer()
+    
+    assert categorizer.categorize_item('GV BROCOLI CROWNS') == 'Vegetables'
+    assert categorizer.categorize_item('KIRKLAND BANNANAS') == 'Fruits'
+    assert categorizer.categorize_item('CHIKEN BRST') == 'Meat'
+    assert categorizer.categorize_item('AVACADO LG') == 'Fruits'
@@ -0,0 +1,41 @@
+import pandas as pd
+from item_stats import ItemStats
+from nutrition_analyzer import NutritionAnalyzer
+
+def test_recommendations_from_category_and_score_only():
+    # Parsed receipt items have no id or item_name columns
+    items_df = pd.DataFrame({
+        'item': ['CHIPS', 'SODA', 'APPLE'],
+        'category': ['Snacks', 'Beverages', 'Fruits'],
+        'nutrition_score': [3, 2, 9]
+    })
+    
+    recommendations = NutritionAnalyzer().get_recommendations(items_df[['category', 'nutrition_score']])
+    
+    assert recommendations == NutritionAnalyzer().get_recommendations(items_df)
+    assert any('processed foods' in text for text in recommendations)
+    assert any('healthier alternatives' in text for text in recommendations)
+
+def test_recommendations_match_item_stats():
+    items_df = pd.DataFrame({
+        'id': [1, 2, 3, 4],
+        'item_name': ['APPLE', 'KALE', 'CANDY', 'MILK'],
+        'price': [1.0, 2.0, 3.0, 4.0],
+        'category': ['Fruits', 'Vegetables', 'Snacks', 'Dairy'],
+        'nutrition_score': [9, 9, 2, 6]
+    })
+    analyzer = NutritionAnalyzer()
+    
+    assert analyzer.get_recommendations(items_df) == \
+        analyzer.get_recommendations_from_stats(ItemStats.from_frame(items_df))
+
+def test_recommendations_for_no_items():
+    assert NutritionAnalyzer().get_recommendations(pd.DataFrame(columns=['category', 'nutrition_score'])) == []
+
+def test_spelling_correction_keeps_correctly_spelled_words():
+    analyzer = NutritionAnalyzer()
+    
+    assert analyzer.correct_spelling('sour cream') == 'sour cream'
+    assert analyzer.correct_spelling('watermelon') == 'watermelon'
+    assert analyzer.correct_spelling('chiken breast') == 'chicken breast'
+    assert analyzer.get_nutrition_score('sour cream') == 5
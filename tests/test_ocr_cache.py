@@ -0,0 +1,52 @@
+import sqlite3
+from PIL import Image, ImageDraw
+from database import Database
+from image_preprocessor import ImagePreprocessor
+from ocr_cache import OCRCache
+from ocr_processor import OCRProcessor
+
+def receipt_image(text='MILK 3.49'):
+    image = Image.new('L', (200, 120), 255)
+    ImageDraw.Draw(image).text((10, 50), text, fill=0)
+    return image
+
+def test_cache_table_comes_from_migrations(tmp_path):
+    path = str(tmp_path / 'grocery.db')
+    # A cache table from before it was keyed by OCR settings
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE ocr_cache (pixel_hash TEXT PRIMARY KEY, perceptual_hash INTEGER, text TEXT, items TEXT)')
+    conn.close()
+    
+    db = Database(path)
+    with db.connections.read() as conn:
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(ocr_cache)')}
+    assert {'ocr_key', 'thumbnail', 'parser_version'} <= columns
+
+def test_entries_are_keyed_by_ocr_settings_and_parser_version(tmp_path):
+    cache = OCRCache(Database(str(tmp_path / 'grocery.db')))
+    image = receipt_image()
+    
+    cache.store(cache.image_keys(image, 'psm6'), 'MILK 3.49', [{'item': 'MILK', 'price': 3.49}], parser_version=1)
+    
+    assert cache.lookup(cache.image_keys(image, 'psm6'), parser_version=1)['items'] == [{'item': 'MILK', 'price': 3.49}]
+    # The text is still good for a newer parser, the items are not
+    assert cache.lookup(cache.image_keys(image, 'psm6'), parser_version=2) == {'text': 'MILK 3.49', 'items': None}
+    assert cache.lookup(cache.image_keys(image, 'psm4'), parser_version=1) is None
+
+def test_processor_settings_change_the_cache_key(tmp_path):
+    cache = OCRCache(Database(str(tmp_path / 'grocery.db')))
+    runs = []
+    
+    def processor(**settings):
+        ocr = OCRProcessor(cache=cache, **settings)
+        ocr._extract_text = lambda image: runs.append(1) or 'MILK 3.49'
+        return ocr
+    
+    image = receipt_image()
+    processor().process_receipt(image)
+    processor().process_receipt(image)
+    assert len(runs) == 1
+    
+    processor(preprocessor=ImagePreprocessor(threshold_percent=20)).process_receipt(image)
+    processor(single_pass=True).process_receipt(image)
+    assert len(runs) == 3
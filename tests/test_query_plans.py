@@ -0,0 +1,95 @@
+"""
+Query plan regression check: fills a temporary database with synthetic
+receipts, runs every public Database query and fails if SQLite plans a full
+scan of receipts or items where an index should be used.
+
+Runs on 20k items by default; set QUERY_PLAN_ITEMS to check at a larger
+scale, e.g. QUERY_PLAN_ITEMS=1000000 python -m pytest tests/test_query_plans.py
+"""
+import os
+import random
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import Database
+from item_categorizer import ItemCategorizer
+
+ITEM_COUNT = int(os.environ.get('QUERY_PLAN_ITEMS', 20000))
+
+# The categories the app stores
+CATEGORIES = ItemCategorizer().get_all_categories()
+
+MONTH_START = datetime(2024, 6, 1)
+MONTH_END = datetime(2024, 6, 30, 23, 59, 59)
+
+# (label, call) for every read query the app uses that should use an index.
+# Whole-table aggregates (get_total_spending, get_category_labels,
+# get_ingested_hashes, the custom mapping reads) and the first items page,
+# which stops at a LIMIT while walking the primary key, read every row by
+# design and are not listed.
+INDEXED_QUERIES = [
+    ('get_receipts', lambda db: db.get_receipts(limit=10)),
+    ('get_all_items', lambda db: db.get_all_items()),
+    ('get_items_page_df (next page)', lambda db: db.get_items_page_df(before_id=ITEM_COUNT // 2, limit=10000)),
+    ('get_items_by_date_range', lambda db: db.get_items_by_date_range(MONTH_START, MONTH_END)),
+    ('get_spending_by_category (date range)', lambda db: db.get_spending_by_category(MONTH_START, MONTH_END)),
+    ('get_spending_by_category (all time)', lambda db: db.get_spending_by_category()),
+    ('get_labeled_item_count', lambda db: db.get_labeled_item_count()),
+    ('get_budget_setting', lambda db: db.get_budget_setting())
+]
+
+# "SCAN items" / "SCAN i" with no index behind it
+FULL_SCAN = re.compile(r'^SCAN \w+$')
+
+def populate(db, item_count, items_per_receipt=10, seed=0):
+    """Insert synthetic receipts spread over three years"""
+    rng = random.Random(seed)
+    start = datetime(2022, 1, 1)
+    receipt_count = item_count // items_per_receipt
+    
+    with db.connections.write() as cursor:
+        cursor.executemany('INSERT INTO receipts (id, date, total_amount) VALUES (?, ?, ?)', (
+            (receipt_id, start + timedelta(minutes=rng.randrange(3 * 365 * 24 * 60)), 0.0)
+            for receipt_id in range(1, receipt_count + 1)
+        ))
+        cursor.executemany('''
+            INSERT INTO items (receipt_id, item_name, price, category, nutrition_score)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (
+            (position // items_per_receipt + 1, f"ITEM {rng.randrange(5000)}", round(rng.uniform(0.5, 20), 2),
+             rng.choice(CATEGORIES), rng.randint(1, 10))
+            for position in range(receipt_count * items_per_receipt)
+        ))
+        cursor.execute('UPDATE receipts SET total_amount = '
+                       '(SELECT SUM(price) FROM items WHERE items.receipt_id = receipts.id)')
+        cursor.execute('ANALYZE')
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory):
+    database = Database(str(tmp_path_factory.mktemp('plans') / 'plans.db'))
+    populate(database, ITEM_COUNT)
+    yield database
+    database.connections.close()
+
+def query_plans(db, call):
+    """Plan details of every SELECT the call runs"""
+    statements = []
+    db.connections.trace(statements.append)
+    try:
+        call(db)
+    finally:
+        db.connections.trace(None)
+    
+    # The trace has parameters already bound, so the plan matches the real query
+    queries = [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+    assert queries, "the call ran no query"
+    with db.connections.read() as conn:
+        return [row[3] for sql in queries for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+
+@pytest.mark.parametrize('label, call', INDEXED_QUERIES, ids=[label for label, _ in INDEXED_QUERIES])
+def test_query_uses_an_index(db, label, call):
+    plans = query_plans(db, call)
+    scans = [detail for detail in plans if FULL_SCAN.match(detail)]
+    assert not scans, f"{label} scans a whole table without an index: {plans}"
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+from unique_names import apply_to_unique_names
+
+def test_each_distinct_name_is_computed_once():
+    calls = []
+    
+    def lengths(names):
+        calls.append(names)
+        return [len(name) for name in names]
+    
+    names = pd.Series(['Kale', None, 'KALE', 3, 'chips'], index=[5, 6, 7, 8, 9], name='item')
+    result = apply_to_unique_names(names, lengths, 0, dtype=np.int64)
+    
+    assert calls == [['kale', 'chips']]
+    assert result.tolist() == [4, 0, 4, 0, 5]
+    assert list(result.index) == [5, 6, 7, 8, 9] and result.name == 'item'
+
+def test_container_type_is_kept():
+    upper = lambda names: [name.upper() for name in names]
+    
+    assert apply_to_unique_names(['a', 'A'], upper, None) == ['A', 'A']
+    assert isinstance(apply_to_unique_names(np.array(['a']), upper, None), np.ndarray)
+    # List results stay one element each
+    assert apply_to_unique_names(['a', None], lambda names: [[name] for name in names], []) == [['a'], []]
@@ -0,0 +1,124 @@
+import math
+import re
+import numpy as np
+from keyword_matcher import KeywordMatcher
+
+WORD_PATTERN = re.compile(r'\w+')
+
+def trigrams(text):
+    """Set of character trigrams of each word, padded like PostgreSQL's pg_trgm"""
+    grams = set()
+    for word in WORD_PATTERN.findall(text.lower()):
+        padded = '  ' + word + ' '
+        for start in range(len(padded) - 2):
+            grams.add(padded[start:start + 3])
+    return grams
+
+class TrigramIndex:
+    """Approximate name lookup by character-trigram similarity
+    
+    Tolerates the misspellings OCR produces ("BANNANAS", "BROCOLI CRWN").
+    Similarity is the Jaccard index of the two trigram sets. Each trigram has
+    a posting list of the names containing it, so a query only touches the
+    names sharing at least one trigram with it.
+    """
+    
+    def __init__(self, names, cutoff=0.4):
+        self.names = list(names)
+        # Default minimum similarity for a result
+        self.cutoff = cutoff
+        
+        postings = {}
+        self._sizes = np.zeros(len(self.names), dtype=np.int32)
+        for position, name in enumerate(self.names):
+            grams = trigrams(name)
+            self._sizes[position] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self._postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def query(self, text, k=5, cutoff=None):
+        """Up to k (name, similarity) pairs at or above cutoff, most similar first
+        
+        Equally similar names keep the order they were given in.
+        """
+        cutoff = self.cutoff if cutoff is None else cutoff
+        grams = trigrams(text)
+        if not grams or k <= 0:
+            return []
+        size = len(grams)
+        
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return []
+        
+        # Shared trigram counts for every name. Similarity >= cutoff needs at
+        # least cutoff * size of them, which rules out nearly all names before
+        # any similarity is computed
+        counts = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        min_shared = max(1, math.ceil(cutoff * size - 1e-9))
+        candidates = np.flatnonzero(counts >= min_shared)
+        shared = counts[candidates]
+        similarity = shared / (size + self._sizes[candidates] - shared)
+        
+        keep = similarity >= cutoff
+        candidates, similarity = candidates[keep], similarity[keep]
+        if len(candidates) > k:
+            # Everything tied with the k-th best stays, so ties resolve by position
+            kth = np.partition(similarity, len(similarity) - k)[len(similarity) - k]
+            keep = similarity >= kth
+            candidates, similarity = candidates[keep], similarity[keep]
+        
+        order = np.lexsort((candidates, -similarity))[:k]
+        return [(self.names[candidates[i]], float(similarity[i])) for i in order]
+    
+    def nearest(self, text, cutoff=None):
+        """Most similar name at or above cutoff, or None"""
+        results = self.query(text, k=1, cutoff=cutoff)
+        return results[0][0] if results else None
+
+class SpellingCorrector:
+    """Word-by-word correction of OCR misreadings against a vocabulary
+    
+    Words of three characters or fewer have too few trigrams to tell apart
+    and are kept, as are known words and words containing a known word
+    longer than three characters ("tomatoes", "watermelon"), which are
+    inflections or compounds rather than misreadings. Any other word is
+    replaced by the most similar known word at or above the cutoff.
+    
+    source optionally holds more known words outside memory: an object with
+    contains_word(text) and nearest_words(text, k, cutoff), like a
+    NutritionCatalog. Its words win ties.
+    """
+    
+    def __init__(self, words, cutoff=0.4, source=None):
+        words = list(dict.fromkeys(words))
+        self.source = source
+        self._index = TrigramIndex(words, cutoff)
+        self._matcher = KeywordMatcher(word for word in words if len(word) > 3)
+    
+    def is_known(self, word):
+        """Whether word is, or contains, a known word longer than three characters"""
+        if self._matcher.first(word) is not None:
+            return True
+        return self.source is not None and self.source.contains_word(word)
+    
+    def nearest(self, word):
+        """Most similar known word at or above the cutoff, or None"""
+        matches = self._index.query(word, k=1)
+        if self.source is not None:
+            matches = self.source.nearest_words(word, k=1, cutoff=self._index.cutoff) + matches
+        return max(matches, key=lambda match: match[1])[0] if matches else None
+    
+    def correct(self, text):
+        """text with each misspelled word replaced by the closest known word"""
+        def replace(match):
+            word = match.group(0)
+            if len(word) <= 3 or self.is_known(word):
+                return word
+            return self.nearest(word) or word
+        
+        return WORD_PATTERN.sub(replace, text)
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+def apply_to_unique_names(names, function, missing, dtype=object):
+    """Apply function once to the distinct lower-cased names and broadcast the results back
+    
+    names is a list, NumPy array or pandas Series. function takes the list of
+    distinct lower-cased names and returns one result per name; missing and
+    non-string values get missing. Returns the same kind of container as
+    given (a Series keeps its index), with results in a dtype array.
+    """
+    series = names if isinstance(names, pd.Series) else pd.Series(list(names), dtype=object)
+    
+    # Factorize on the lower-cased name; missing and non-string values get code -1
+    try:
+        normalized = series.astype(object).str.lower()
+    except AttributeError:
+        # No string values at all
+        normalized = pd.Series(np.nan, index=series.index, dtype=object)
+    codes, uniques = pd.factorize(normalized)
+    
+    # Filled one by one, so list results stay single elements
+    results = np.empty(len(uniques) + 1, dtype=dtype)
+    for index, result in enumerate(function(list(uniques))):
+        results[index] = result
+    results[-1] = missing  # codes of -1 index the last slot
+    broadcast = results[codes]
+    
+    if isinstance(names, pd.Series):
+        return pd.Series(broadcast, index=names.index, name=names.name)
+    if isinstance(names, np.ndarray):
+        return broadcast
+    return broadcast.tolist()